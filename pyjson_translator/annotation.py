@@ -1,19 +1,23 @@
 import functools
 import inspect
 
+from .capture_util import capture_call
 from .error_handle import fail_to_translator
 from .logger_setting import pyjson_translator_logging as logging
 from .serialize import (
     serialize_value,
     deserialize_value
 )
+from .stats_util import with_stats
 
 
 def with_prepare_func_json_data(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        prepare_json_data(func, args, kwargs)
-        return func(*args, **kwargs)
+        json_data = prepare_json_data(func, args, kwargs)
+        result = func(*args, **kwargs)
+        capture_call(func, args, kwargs, json_data, result)
+        return result
 
     return wrapper
 
@@ -22,25 +26,31 @@ def with_post_func_data(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         result = func(*args, **kwargs)
-        return_type = type(result)
-
-        if result is None:
-            return result
-
-        if return_type is not inspect.Signature.empty and isinstance(return_type, tuple):
-            serialized_results = tuple(serialize_value(val) for val in result)
-            deserialized_results = tuple(deserialize_value(val, typ)
-                                         for val, typ in zip(serialized_results, return_type))
-            return deserialized_results
-        elif return_type is not inspect.Signature.empty:
-            serialized_result = serialize_value(result)
-            return deserialize_value(serialized_result, return_type)
-        else:
-            fail_to_translator(f"Unhandled real post_func type {type(return_type).__name__}")
+        return post_func_data(func, result)
 
     return wrapper
 
 
+@with_stats('post_func', lambda func, result: func.__qualname__, lambda func, result: result)
+def post_func_data(func, result):
+    return_type = type(result)
+
+    if result is None:
+        return result
+
+    if return_type is not inspect.Signature.empty and isinstance(return_type, tuple):
+        serialized_results = tuple(serialize_value(val) for val in result)
+        deserialized_results = tuple(deserialize_value(val, typ)
+                                     for val, typ in zip(serialized_results, return_type))
+        return deserialized_results
+    elif return_type is not inspect.Signature.empty:
+        serialized_result = serialize_value(result)
+        return deserialize_value(serialized_result, return_type)
+    else:
+        fail_to_translator(f"Unhandled real post_func type {type(return_type).__name__}")
+
+
+@with_stats('prepare_func', lambda func, args, kwargs: func.__qualname__)
 def prepare_json_data(func, args, kwargs):
     sig = inspect.signature(func)
     bound_args = sig.bind(*args, **kwargs)
@@ -0,0 +1,160 @@
+import argparse
+import inspect
+import json
+import os
+import random
+import threading
+import time
+from importlib import metadata
+
+from .error_handle import fail_to_translator
+from .logger_setting import pyjson_translator_logging as logging
+from .serialize import serialize_value, deserialize_value
+from .type_path_util import type_path, resolve_type_path
+
+_capture_lock = threading.Lock()
+_capture_config = None
+
+
+def set_capture_file(path: str,
+                     sample_rate: float = 1.0,
+                     max_payload_bytes: int = 1024 * 1024,
+                     max_file_bytes: int = 100 * 1024 * 1024):
+    """
+    Record calls of ``with_prepare_func_json_data`` decorated functions as JSON lines.
+
+    :param path: the capture file, appended to if it exists.
+    :param sample_rate: the fraction of calls recorded, between 0 and 1.
+    :param max_payload_bytes: calls with a larger encoded record are skipped.
+    :param max_file_bytes: recording stops once the file reaches this size.
+    """
+    global _capture_config
+    if not 0 <= sample_rate <= 1:
+        fail_to_translator(f"Capture sample_rate must be between 0 and 1, got {sample_rate}")
+    with _capture_lock:
+        _capture_config = {
+            'path': path,
+            'sample_rate': sample_rate,
+            'max_payload_bytes': max_payload_bytes,
+            'max_file_bytes': max_file_bytes,
+            'file_bytes': os.path.getsize(path) if os.path.exists(path) else 0,
+        }
+
+
+def disable_capture():
+    global _capture_config
+    with _capture_lock:
+        _capture_config = None
+
+
+def capture_call(func, args, kwargs, json_data: dict, result: any):
+    config = _capture_config
+    if config is None or random.random() >= config['sample_rate']:
+        return
+
+    try:
+        bound_args = inspect.signature(func).bind(*args, **kwargs)
+        bound_args.apply_defaults()
+        record = {
+            'function': f"{func.__module__}.{func.__qualname__}",
+            'library_version': _library_version(),
+            'arguments': json_data,
+            'argument_types': {name: type_path(type(arg_value))
+                               for name, arg_value in bound_args.arguments.items() if name in json_data},
+            'result': serialize_value(result),
+            'result_type': type_path(type(result)),
+        }
+        line = json.dumps(record, default=str) + "\n"
+    except Exception as e:
+        logging.debug(f"Skipping capture of {func.__qualname__}: {e}")
+        return
+
+    encoded_line = line.encode('utf-8')
+    if len(encoded_line) > config['max_payload_bytes']:
+        logging.debug(f"Skipping capture of {func.__qualname__}: {len(encoded_line)} bytes exceeds payload cap")
+        return
+    with _capture_lock:
+        if config is not _capture_config or config['file_bytes'] + len(encoded_line) > config['max_file_bytes']:
+            return
+        with open(config['path'], 'ab') as capture_file:
+            capture_file.write(encoded_line)
+        config['file_bytes'] += len(encoded_line)
+
+
+def replay_capture(path: str, iterations: int = 1) -> dict:
+    """
+    Re-run deserialize/serialize for every recorded argument and result.
+
+    Values whose type cannot be imported (e.g. classes defined in a function)
+    are skipped.
+
+    :return: a report with throughput and latency percentiles per function.
+    """
+    with open(path, 'r', encoding='utf-8') as capture_file:
+        records = [json.loads(line) for line in capture_file if line.strip()]
+
+    latencies = {}
+    skipped = 0
+    total_start = time.perf_counter()
+    for _ in range(iterations):
+        for record in records:
+            payloads = [(record['arguments'][name], record['argument_types'][name])
+                        for name in record['arguments']]
+            payloads.append((record['result'], record['result_type']))
+            for payload, payload_type_path in payloads:
+                payload_type = resolve_type_path(payload_type_path)
+                if payload_type is None:
+                    skipped += 1
+                    continue
+                start = time.perf_counter()
+                serialize_value(deserialize_value(payload, payload_type))
+                latencies.setdefault(record['function'], []).append(time.perf_counter() - start)
+    total_seconds = time.perf_counter() - total_start
+
+    operations = sum(len(function_latencies) for function_latencies in latencies.values())
+    return {
+        'library_version': _library_version(),
+        'records': len(records),
+        'iterations': iterations,
+        'operations': operations,
+        'skipped': skipped,
+        'total_seconds': total_seconds,
+        'operations_per_second': operations / total_seconds if total_seconds else 0.0,
+        'functions': {function: _latency_summary(function_latencies)
+                      for function, function_latencies in latencies.items()},
+    }
+
+
+def _latency_summary(latencies: list) -> dict:
+    ordered = sorted(latencies)
+
+    def percentile(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    return {
+        'count': len(ordered),
+        'mean_seconds': sum(ordered) / len(ordered),
+        'p50_seconds': percentile(0.50),
+        'p95_seconds': percentile(0.95),
+        'p99_seconds': percentile(0.99),
+        'max_seconds': ordered[-1],
+    }
+
+
+def _library_version():
+    try:
+        return metadata.version('pyjson_translator')
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a pyjson_translator capture file.")
+    parser.add_argument('path', help="capture file written by set_capture_file")
+    parser.add_argument('--iterations', type=int, default=1, help="number of passes over the capture")
+    parsed_args = parser.parse_args(argv)
+    print(json.dumps(replay_capture(parsed_args.path, parsed_args.iterations), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+import itertools
+import sys
+from typing import Optional
+
+COLUMNAR_KEY = '_columnar'
+CLASS_DATA_KEY = '_class_data'
+
+
+def encode_columnar(serialized_items: list) -> Optional[dict]:
+    """
+    Encode serialized records sharing the same keys as
+    ``{'_columnar': {'length', 'fields', 'columns'}}``, the field names once
+    and a value array per field. A ``_class_data`` shared by every record is
+    stored once as ``class_data``.
+
+    :return: None when the items are not dicts with the same keys.
+    """
+    if not serialized_items or serialized_items[0].__class__ is not dict:
+        return None
+    first_item = serialized_items[0]
+    first_keys = first_item.keys()
+    for item in serialized_items:
+        if item.__class__ is not dict or item.keys() != first_keys:
+            return None
+
+    fields = list(first_item)
+    columnar = {'length': len(serialized_items), 'fields': fields}
+    class_data = first_item.get(CLASS_DATA_KEY)
+    if class_data is not None and all(item[CLASS_DATA_KEY] == class_data for item in serialized_items):
+        fields.remove(CLASS_DATA_KEY)
+        columnar['class_data'] = class_data
+    columnar['columns'] = [[item[field] for item in serialized_items] for field in fields]
+    return {COLUMNAR_KEY: columnar}
+
+
+def is_columnar(value: any) -> bool:
+    return value.__class__ is dict and COLUMNAR_KEY in value
+
+
+def decode_columnar(value: dict) -> list:
+    """
+    Rebuild the serialized records of a columnar value, every record sharing
+    the interned field name strings.
+    """
+    columnar = value[COLUMNAR_KEY]
+    fields = [sys.intern(field) for field in columnar['fields']]
+    columns = list(columnar['columns'])
+    class_data = columnar.get('class_data')
+    if class_data is not None:
+        fields.append(CLASS_DATA_KEY)
+        columns.append(itertools.repeat(class_data, columnar['length']))
+    if not fields:
+        return [{} for _ in range(columnar['length'])]
+    return [dict(zip(fields, row)) for row in zip(*columns)]
@@ -0,0 +1,450 @@
+from collections.abc import Sequence, Set, Mapping
+from itertools import compress
+from operator import attrgetter, itemgetter, ne
+
+from flask_sqlalchemy import SQLAlchemy
+from marshmallow import fields, missing
+from pydantic import BaseModel
+
+from .db_sqlalchemy_instance import default_sqlalchemy_instance as db
+from .error_handle import fail_to_translator
+from .logger_setting import pyjson_translator_logging as logging
+from .marshmallow_db_util import generate_db_schema
+from .record_class_util import generate_record_encoder, get_record_field_names
+from .serialize import serialize_value, deserialize_value
+
+GLOBAL_DELTA_SCHEMA_CACHE = {}
+GLOBAL_DELTA_FIELD_NAMES_CACHE = {}
+GLOBAL_DELTA_PYDANTIC_FIELDS_CACHE = {}
+
+_PRIMITIVE_CLASSES = frozenset((int, float, str, bool, type(None)))
+# marshmallow fields which dump a value of their own type as it is
+_PLAIN_ORM_FIELD_CLASSES = (fields.Integer, fields.String, fields.Boolean, fields.Float)
+
+
+def serialize_delta(value: any,
+                    previous_serialized: any,
+                    db_sqlalchemy_instance: SQLAlchemy = db,
+                    db_sqlalchemy_merge: bool = False) -> list:
+    """
+    Compute a patch that turns ``previous_serialized`` into ``serialize_value(value)``.
+
+    The live object is walked against the snapshot and only changed subtrees
+    are encoded, so unchanged fields never allocate a serialized copy. Pydantic
+    models are compared field by field without ``model_dump``, except for
+    values whose dumped form only pydantic knows.
+
+    :return: a list of ``{'op': 'replace' | 'add' | 'remove', 'path': [...], 'value': ...}``
+             operations, empty when nothing changed.
+    """
+    delta = []
+    _diff_value(value, previous_serialized, [], delta, db_sqlalchemy_instance, db_sqlalchemy_merge)
+    logging.debug(f"Serialized delta with {len(delta)} operations for: {type(value).__name__}")
+    return delta
+
+
+def patch_serialized(previous_serialized: any, delta: list) -> any:
+    """
+    Apply ``delta`` to a serialized snapshot and return the new snapshot.
+
+    Containers along patched paths are copied, untouched subtrees are shared
+    with ``previous_serialized``, which is never modified.
+    """
+    patched = previous_serialized
+    copied_ids = set()
+    for operation in delta:
+        patched = _patch_path(patched, operation['path'], operation, copied_ids)
+    return patched
+
+
+def apply_delta(previous_serialized: any,
+                delta: list,
+                expected_type: type = None,
+                db_sqlalchemy_instance: SQLAlchemy = db,
+                db_sqlalchemy_merge: bool = False):
+    patched = patch_serialized(previous_serialized, delta)
+    return deserialize_value(patched, expected_type, db_sqlalchemy_instance, db_sqlalchemy_merge)
+
+
+class _Unwalkable(Exception):
+    """
+    A pydantic field value whose ``model_dump`` representation is not known
+    without dumping it.
+    """
+
+
+def _replace(path: list, new_serialized: any, delta: list):
+    delta.append({'op': 'replace', 'path': list(path), 'value': new_serialized})
+
+
+def _add(path: list, key: any, new_serialized: any, delta: list):
+    delta.append({'op': 'add', 'path': path + [key], 'value': new_serialized})
+
+
+def _is_unchanged_primitive(value, previous) -> bool:
+    # compare classes too: True == 1 == 1.0 but they serialize differently
+    return value.__class__ is previous.__class__ and value == previous
+
+
+def _diff_value(value, previous, path, delta, db_sqlalchemy_instance, db_sqlalchemy_merge):
+    """
+    Walk ``value`` against its snapshot, ``path`` is extended and restored in place.
+    """
+    if value.__class__ in _PRIMITIVE_CLASSES:
+        if not _is_unchanged_primitive(value, previous):
+            _replace(path, value, delta)
+        return
+
+    record_encoder = generate_record_encoder(type(value))
+    if record_encoder and not isinstance(value, tuple) and isinstance(previous, Mapping):
+        _diff_fields(value, _get_record_field_names(type(value)), previous, path, delta,
+                     db_sqlalchemy_instance, db_sqlalchemy_merge)
+        return
+    if isinstance(value, BaseModel) and isinstance(previous, Mapping):
+        _diff_pydantic_model(value, previous, path, delta)
+        return
+    if isinstance(value, db_sqlalchemy_instance.Model) and isinstance(previous, Mapping):
+        _diff_orm_model(value, previous, path, delta, db_sqlalchemy_instance, db_sqlalchemy_merge)
+        return
+    if isinstance(value, Sequence) and not isinstance(value, bytes) and isinstance(previous, list):
+        _diff_sequence(value, previous, path, delta,
+                       lambda item, previous_item: _diff_value(
+                           item, previous_item, path, delta, db_sqlalchemy_instance, db_sqlalchemy_merge),
+                       lambda item: serialize_value(item, db_sqlalchemy_instance, db_sqlalchemy_merge),
+                       _get_item_field_names(value, _get_record_field_names))
+        return
+    if isinstance(value, Mapping) and isinstance(previous, Mapping):
+        _diff_mapping(value, previous, path, delta, db_sqlalchemy_instance, db_sqlalchemy_merge)
+        return
+    if not isinstance(value, (Set, bytes, complex)) and hasattr(value, '__dict__') \
+            and isinstance(previous, Mapping):
+        _diff_fields(value, list(value.__dict__), previous, path, delta,
+                     db_sqlalchemy_instance, db_sqlalchemy_merge)
+        return
+
+    _diff_serialized(serialize_value(value, db_sqlalchemy_instance, db_sqlalchemy_merge), previous, path, delta)
+
+
+def _diff_fields(value, field_names, previous, path, delta, db_sqlalchemy_instance, db_sqlalchemy_merge):
+    matched_keys = 0
+    for name in field_names:
+        field_value = getattr(value, name)
+        previous_field = previous.get(name, missing)
+        if previous_field is missing:
+            _add(path, name, serialize_value(field_value, db_sqlalchemy_instance, db_sqlalchemy_merge), delta)
+            continue
+        matched_keys += 1
+        path.append(name)
+        if field_value.__class__ in _PRIMITIVE_CLASSES:
+            if not _is_unchanged_primitive(field_value, previous_field):
+                _replace(path, field_value, delta)
+        else:
+            _diff_value(field_value, previous_field, path, delta, db_sqlalchemy_instance, db_sqlalchemy_merge)
+        path.pop()
+    if matched_keys != len(previous):
+        _remove_stale_keys(field_names, previous, path, delta)
+
+
+def _diff_mapping(value, previous, path, delta, db_sqlalchemy_instance, db_sqlalchemy_merge):
+    serialized_keys = []
+    for key, item in value.items():
+        serialized_key = serialize_value(key, db_sqlalchemy_instance, db_sqlalchemy_merge)
+        serialized_keys.append(serialized_key)
+        if serialized_key in previous:
+            path.append(serialized_key)
+            _diff_value(item, previous[serialized_key], path, delta, db_sqlalchemy_instance, db_sqlalchemy_merge)
+            path.pop()
+        else:
+            _add(path, serialized_key, serialize_value(item, db_sqlalchemy_instance, db_sqlalchemy_merge), delta)
+    _remove_stale_keys(serialized_keys, previous, path, delta)
+
+
+def _diff_pydantic_model(value, previous, path, delta):
+    class_data = previous.get('_class_data')
+    if class_data is None or class_data['qualname'] != value.__class__.__qualname__ \
+            or class_data['module'] != value.__class__.__module__:
+        _replace(path, serialize_value(value), delta)
+        return
+    field_names = _get_pydantic_field_names(value.__class__)
+    if field_names is None:
+        # custom serializers or extra fields, only model_dump knows the representation
+        new_serialized = value.model_dump()
+        new_serialized['_class_data'] = class_data
+        _diff_serialized(new_serialized, previous, path, delta)
+        return
+
+    for name in field_names:
+        field_value = getattr(value, name)
+        if name not in previous:
+            _add(path, name, value.model_dump(include={name})[name], delta)
+            continue
+        path.append(name)
+        path_length = len(path)
+        operation_count = len(delta)
+        try:
+            _diff_pydantic_value(field_value, previous[name], path, delta)
+        except _Unwalkable:
+            del path[path_length:]
+            del delta[operation_count:]
+            _diff_serialized(value.model_dump(include={name})[name], previous[name], path, delta)
+        path.pop()
+    _remove_stale_keys(field_names + ('_class_data',), previous, path, delta)
+
+
+def _diff_pydantic_value(value, previous, path, delta):
+    """
+    Compare a pydantic field value with its ``model_dump`` snapshot without
+    dumping it, raise ``_Unwalkable`` for values only ``model_dump`` knows the
+    representation of.
+    """
+    value_class = value.__class__
+    if value_class in _PRIMITIVE_CLASSES:
+        if not _is_unchanged_primitive(value, previous):
+            _replace(path, value, delta)
+        return
+    field_names = _get_pydantic_field_names(value_class)
+    if field_names is not missing:
+        if field_names is None or previous.__class__ is not dict or len(previous) != len(field_names):
+            raise _Unwalkable()
+        for name in field_names:
+            if name not in previous:
+                # e.g. a subclass of the field type, dumped with the fields of the field type
+                raise _Unwalkable()
+            field_value = getattr(value, name)
+            previous_field = previous[name]
+            if field_value.__class__ in _PRIMITIVE_CLASSES:
+                if not _is_unchanged_primitive(field_value, previous_field):
+                    path.append(name)
+                    _replace(path, field_value, delta)
+                    path.pop()
+            else:
+                path.append(name)
+                _diff_pydantic_value(field_value, previous_field, path, delta)
+                path.pop()
+    elif value_class is list or value_class is tuple:
+        if previous.__class__ is not list:
+            raise _Unwalkable()
+        _diff_sequence(value, previous, path, delta,
+                       lambda item, previous_item: _diff_pydantic_value(item, previous_item, path, delta),
+                       _dump_pydantic_item, _get_item_field_names(value, _get_pydantic_field_names))
+    elif value_class is dict:
+        if previous.__class__ is not dict:
+            raise _Unwalkable()
+        for key, item in value.items():
+            if key.__class__ is not str:
+                raise _Unwalkable()
+            if key in previous:
+                path.append(key)
+                _diff_pydantic_value(item, previous[key], path, delta)
+                path.pop()
+            else:
+                _add(path, key, _dump_pydantic_item(item), delta)
+        _remove_stale_keys(value, previous, path, delta)
+    elif not _is_unchanged_primitive(value, previous):
+        # other values are unchanged only if model_dump kept them as they are
+        raise _Unwalkable()
+
+
+def _dump_pydantic_item(item):
+    if item.__class__ in _PRIMITIVE_CLASSES:
+        return item
+    if isinstance(item, BaseModel):
+        return item.model_dump()
+    raise _Unwalkable()
+
+
+def _get_pydantic_field_names(value_class: type):
+    """
+    :return: the ``model_dump`` keys of a pydantic model class, None when only
+             ``model_dump`` knows them and ``missing`` for any other class.
+    """
+    if value_class not in GLOBAL_DELTA_PYDANTIC_FIELDS_CACHE:
+        if not issubclass(value_class, BaseModel):
+            field_names = missing
+        elif value_class.__pydantic_decorators__.field_serializers \
+                or value_class.__pydantic_decorators__.model_serializers \
+                or value_class.model_config.get('extra') == 'allow':
+            field_names = None
+        else:
+            field_names = tuple(name for name, field_info in value_class.model_fields.items()
+                                if not field_info.exclude) + tuple(value_class.model_computed_fields)
+        GLOBAL_DELTA_PYDANTIC_FIELDS_CACHE[value_class] = field_names
+    return GLOBAL_DELTA_PYDANTIC_FIELDS_CACHE[value_class]
+
+
+def _get_record_field_names(value_class: type):
+    if value_class not in GLOBAL_DELTA_FIELD_NAMES_CACHE:
+        # tuple records serialize as lists, which are diffed item by item
+        if generate_record_encoder(value_class) and not issubclass(value_class, tuple):
+            GLOBAL_DELTA_FIELD_NAMES_CACHE[value_class] = tuple(get_record_field_names(value_class))
+        else:
+            GLOBAL_DELTA_FIELD_NAMES_CACHE[value_class] = None
+    return GLOBAL_DELTA_FIELD_NAMES_CACHE[value_class]
+
+
+def _diff_orm_model(value, previous, path, delta, db_sqlalchemy_instance, db_sqlalchemy_merge):
+    schema = _get_schema_instance(value, db_sqlalchemy_instance, db_sqlalchemy_merge)
+    serialized_keys = []
+    for field_name, field in schema.dump_fields.items():
+        attr_name = field.attribute or field_name
+        key = field.data_key or field_name
+        if isinstance(field, fields.Nested) and field.many and isinstance(previous.get(key), list):
+            serialized_keys.append(key)
+            path.append(key)
+            items = getattr(value, attr_name)
+            _diff_sequence(items, previous[key], path, delta,
+                           lambda item, previous_item: _diff_value(
+                               item, previous_item, path, delta, db_sqlalchemy_instance, db_sqlalchemy_merge),
+                           lambda item: serialize_value(item, db_sqlalchemy_instance, db_sqlalchemy_merge),
+                           _get_item_field_names(items, lambda item_class: _get_orm_column_names(
+                               item_class, db_sqlalchemy_instance, db_sqlalchemy_merge)))
+            path.pop()
+            continue
+        serialized_field = field.serialize(attr_name, value)
+        if serialized_field is missing:
+            continue
+        serialized_keys.append(key)
+        if key in previous:
+            path.append(key)
+            _diff_serialized(serialized_field, previous[key], path, delta)
+            path.pop()
+        else:
+            _add(path, key, serialized_field, delta)
+    _remove_stale_keys(serialized_keys, previous, path, delta)
+
+
+def _get_orm_column_names(model_class: type, db_sqlalchemy_instance, db_sqlalchemy_merge):
+    """
+    :return: the dump keys of an ORM model class when every field dumps its
+             attribute unchanged, otherwise None.
+    """
+    cache_key = (model_class, db_sqlalchemy_merge)
+    if cache_key not in GLOBAL_DELTA_FIELD_NAMES_CACHE:
+        schema = _get_schema_instance(model_class(), db_sqlalchemy_instance, db_sqlalchemy_merge)
+        column_names = tuple(schema.dump_fields)
+        for field_name, field in schema.dump_fields.items():
+            if type(field) not in _PLAIN_ORM_FIELD_CLASSES or getattr(field, 'as_string', False) \
+                    or field.attribute not in (None, field_name) or field.data_key not in (None, field_name):
+                column_names = None
+                break
+        GLOBAL_DELTA_FIELD_NAMES_CACHE[cache_key] = column_names
+    return GLOBAL_DELTA_FIELD_NAMES_CACHE[cache_key]
+
+
+def _get_schema_instance(value, db_sqlalchemy_instance, db_sqlalchemy_merge):
+    cache_key = (value.__class__, db_sqlalchemy_merge)
+    if cache_key not in GLOBAL_DELTA_SCHEMA_CACHE:
+        GLOBAL_DELTA_SCHEMA_CACHE[cache_key] = generate_db_schema(value, db_sqlalchemy_instance,
+                                                                  db_sqlalchemy_merge)()
+    return GLOBAL_DELTA_SCHEMA_CACHE[cache_key]
+
+
+def _diff_sequence(items, previous, path, delta, diff_item, serialize_item, item_field_names=None):
+    common_length = min(len(items), len(previous))
+    changed_indexes = None
+    if item_field_names:
+        changed_indexes = _changed_item_indexes(items, previous, item_field_names)
+    for index in range(common_length) if changed_indexes is None else changed_indexes:
+        path.append(index)
+        diff_item(items[index], previous[index])
+        path.pop()
+    for index in range(common_length, len(items)):
+        _add(path, index, serialize_item(items[index]), delta)
+    for index in reversed(range(common_length, len(previous))):
+        delta.append({'op': 'remove', 'path': path + [index]})
+
+
+def _changed_item_indexes(items, previous, field_names: tuple):
+    """
+    Find the items whose field values differ from their snapshot.
+
+    Columns of field values are built and compared with ``operator`` callables,
+    so unchanged items are skipped without a python level walk. Cells are
+    compared with their classes, as ``_is_unchanged_primitive`` does.
+
+    :return: the changed indexes among the common length, or None when the
+             items are not all of one class with the snapshot keys.
+    """
+    if len(set(map(type, items))) != 1:
+        return None
+    changed_indexes = set()
+    try:
+        if set(map(len, previous)) != {len(field_names)}:
+            return None
+        for name in field_names:
+            column = list(map(attrgetter(name), items))
+            previous_column = list(map(itemgetter(name), previous))
+            # nested models or containers compare unequal to their dumps and are walked
+            changed_indexes.update(compress(range(len(column)), map(
+                ne, zip(map(type, column), column), zip(map(type, previous_column), previous_column))))
+    except (AttributeError, KeyError, TypeError):
+        return None
+    return sorted(changed_indexes)
+
+
+def _get_item_field_names(items, field_names_getter):
+    if not items:
+        return None
+    field_names = field_names_getter(items[0].__class__)
+    return field_names if field_names.__class__ is tuple else None
+
+
+def _diff_serialized(new_serialized, previous, path, delta):
+    if new_serialized is previous:
+        return
+    if isinstance(new_serialized, dict) and isinstance(previous, dict):
+        for key, item in new_serialized.items():
+            if key in previous:
+                path.append(key)
+                _diff_serialized(item, previous[key], path, delta)
+                path.pop()
+            else:
+                _add(path, key, item, delta)
+        _remove_stale_keys(new_serialized, previous, path, delta)
+        return
+    if isinstance(new_serialized, list) and isinstance(previous, list):
+        _diff_sequence(new_serialized, previous, path, delta,
+                       lambda item, previous_item: _diff_serialized(item, previous_item, path, delta),
+                       lambda item: item)
+        return
+    if not _is_unchanged_primitive(new_serialized, previous):
+        _replace(path, new_serialized, delta)
+
+
+def _remove_stale_keys(keys, previous, path, delta):
+    key_set = keys if isinstance(keys, (Set, Mapping)) else set(keys)
+    for key in previous:
+        if key not in key_set:
+            delta.append({'op': 'remove', 'path': path + [key]})
+
+
+def _patch_path(node, path, operation, copied_ids):
+    if not path:
+        if operation['op'] == 'replace':
+            return operation['value']
+        fail_to_translator(f"Unhandled delta operation {operation['op']} at root path")
+
+    key, rest = path[0], path[1:]
+    if id(node) in copied_ids:
+        patched = node
+    elif isinstance(node, (list, dict)):
+        patched = node.copy()
+        copied_ids.add(id(patched))
+    else:
+        fail_to_translator(f"Cannot apply delta path {operation['path']} to {type(node).__name__}")
+        return
+
+    if rest:
+        patched[key] = _patch_path(patched[key], rest, operation, copied_ids)
+    elif operation['op'] == 'replace':
+        patched[key] = operation['value']
+    elif operation['op'] == 'add':
+        if isinstance(patched, list):
+            patched.insert(key, operation['value'])
+        else:
+            patched[key] = operation['value']
+    elif operation['op'] == 'remove':
+        del patched[key]
+    else:
+        fail_to_translator(f"Unhandled delta operation {operation['op']}")
+    return patched
@@ -0,0 +1,296 @@
+import functools
+from collections.abc import Sequence, Set, Mapping
+from typing import get_origin, get_args
+
+from flask_sqlalchemy import SQLAlchemy
+from pydantic import BaseModel, TypeAdapter
+
+from .columnar_util import is_columnar, decode_columnar
+from .db_sqlalchemy_instance import default_sqlalchemy_instance as db
+from .logger_setting import pyjson_translator_logging as logging
+from .record_class_util import get_field_type_hints, is_named_tuple_class
+from .serialize import deserialize_value, resolve_base_model_class
+from .union_util import UNION_TYPES, generate_union_dispatch
+
+GLOBAL_PYDANTIC_LAZY_FIELDS_CACHE = {}
+GLOBAL_TYPE_ADAPTER_CACHE = {}
+
+_UNDECODED = object()
+_PRIMITIVE_TYPES = (int, float, str, bool, bytes, complex)
+
+
+class LazyList(Sequence):
+    """
+    A read-only list that decodes each element on first access and caches it.
+    """
+    __slots__ = ('_raw', '_item_type', '_decode', '_decoded')
+
+    def __init__(self, raw: list, item_type: any, decode):
+        self._raw = raw
+        self._item_type = item_type
+        self._decode = decode
+        self._decoded = [_UNDECODED] * len(raw)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._raw)))]
+        item = self._decoded[index]
+        if item is _UNDECODED:
+            item = self._decode(self._raw[index], self._item_type)
+            self._decoded[index] = item
+        return item
+
+    def __len__(self):
+        return len(self._raw)
+
+    def __eq__(self, other):
+        return isinstance(other, Sequence) and list(self) == list(other)
+
+    def __repr__(self):
+        return f"<LazyList len={len(self._raw)} item_type={self._item_type}>"
+
+    def materialize(self) -> list:
+        return [materialize(item) for item in self]
+
+
+class LazyMapping(Mapping):
+    """
+    A read-only dict that decodes keys up front and each value on first access.
+    """
+    __slots__ = ('_raw', '_value_type', '_decode', '_raw_keys', '_decoded')
+
+    def __init__(self, raw: dict, key_type: any, value_type: any, decode):
+        self._raw = raw
+        self._value_type = value_type
+        self._decode = decode
+        self._raw_keys = {decode(raw_key, key_type): raw_key for raw_key in raw}
+        self._decoded = {}
+
+    def __getitem__(self, key):
+        if key in self._decoded:
+            return self._decoded[key]
+        item = self._decode(self._raw[self._raw_keys[key]], self._value_type)
+        self._decoded[key] = item
+        return item
+
+    def __iter__(self):
+        return iter(self._raw_keys)
+
+    def __len__(self):
+        return len(self._raw_keys)
+
+    def __repr__(self):
+        return f"<LazyMapping len={len(self._raw_keys)} value_type={self._value_type}>"
+
+    def materialize(self) -> dict:
+        return {key: materialize(item) for key, item in self.items()}
+
+
+class LazyObjectProxy:
+    """
+    A read-only proxy for a model or class instance.
+
+    Known fields are decoded on first attribute access and cached, any other
+    attribute (methods, properties, defaults) is read from the materialized
+    object.
+    """
+    __slots__ = ('_raw', '_target_class', '_field_types', '_decode', '_build', '_decoded', '_materialized')
+
+    def __init__(self, raw: dict, target_class: type, field_types: dict, decode, build):
+        object.__setattr__(self, '_raw', raw)
+        object.__setattr__(self, '_target_class', target_class)
+        object.__setattr__(self, '_field_types', field_types)
+        object.__setattr__(self, '_decode', decode)
+        object.__setattr__(self, '_build', build)
+        object.__setattr__(self, '_decoded', {})
+        object.__setattr__(self, '_materialized', _UNDECODED)
+
+    def __getattr__(self, name):
+        if name in self._decoded:
+            return self._decoded[name]
+        if name in self._raw and not name.startswith('_'):
+            field_type = self._field_types.get(name)
+            item = self._raw[name] if field_type is None else self._decode(self._raw[name], field_type)
+            self._decoded[name] = item
+            return item
+        return getattr(self.materialize(), name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"'{self._target_class.__name__}' lazy proxy is read-only")
+
+    def __repr__(self):
+        return f"<LazyObjectProxy {self._target_class.__name__}>"
+
+    def materialize(self):
+        if self._materialized is _UNDECODED:
+            object.__setattr__(self, '_materialized', self._build(self._raw))
+        return self._materialized
+
+
+def deserialize_lazy(value: any,
+                     expected_type: type = None,
+                     db_sqlalchemy_instance: SQLAlchemy = db,
+                     db_sqlalchemy_merge: bool = False):
+    """
+    Deserialize ``value`` lazily.
+
+    Typed sequences, mappings and model values are returned as proxies that
+    run the ``deserialize_value`` rules only when an element or field is first
+    accessed. Everything else is decoded eagerly. Use ``materialize`` to force
+    full decoding.
+    """
+    if value is None:
+        return value
+
+    decode = functools.partial(deserialize_lazy,
+                               db_sqlalchemy_instance=db_sqlalchemy_instance,
+                               db_sqlalchemy_merge=db_sqlalchemy_merge)
+    origin_expected_type = get_origin(expected_type)
+    if origin_expected_type in UNION_TYPES:
+        union_dispatch = generate_union_dispatch(expected_type)
+        union_arm = union_dispatch.arm_types[0] if len(union_dispatch.arm_types) == 1 \
+            else union_dispatch.select_arm(value)
+        if union_arm is not None:
+            return deserialize_lazy(value, union_arm, db_sqlalchemy_instance, db_sqlalchemy_merge)
+    elif isinstance(origin_expected_type, type) and not issubclass(origin_expected_type, (tuple, Set)):
+        if issubclass(origin_expected_type, Sequence):
+            logging.debug(f"Deserializing lazy Sequence: {expected_type}")
+            if is_columnar(value):
+                value = decode_columnar(value)
+            return LazyList(value, get_args(expected_type)[0], decode)
+        if issubclass(origin_expected_type, Mapping):
+            logging.debug(f"Deserializing lazy Mapping: {expected_type}")
+            key_type, value_type = get_args(expected_type)
+            return LazyMapping(value, key_type, value_type, decode)
+    elif _is_proxy_class(expected_type, db_sqlalchemy_instance) and isinstance(value, Mapping):
+        if issubclass(expected_type, BaseModel):
+            return _pydantic_proxy(value, expected_type)
+        logging.debug(f"Deserializing lazy object: {expected_type.__name__}")
+        build = functools.partial(deserialize_value,
+                                  expected_type=expected_type,
+                                  db_sqlalchemy_instance=db_sqlalchemy_instance,
+                                  db_sqlalchemy_merge=db_sqlalchemy_merge)
+        return LazyObjectProxy(value, expected_type, get_field_type_hints(expected_type), decode, build)
+
+    return deserialize_value(value, expected_type, db_sqlalchemy_instance, db_sqlalchemy_merge)
+
+
+def materialize(value: any):
+    if isinstance(value, (LazyList, LazyMapping, LazyObjectProxy)):
+        return value.materialize()
+    return value
+
+
+def _is_proxy_class(expected_type: any, db_sqlalchemy_instance: SQLAlchemy) -> bool:
+    if not isinstance(expected_type, type) or issubclass(expected_type, _PRIMITIVE_TYPES):
+        return False
+    if issubclass(expected_type, (Sequence, Set, Mapping, db_sqlalchemy_instance.Model)):
+        return False
+    return not is_named_tuple_class(expected_type)
+
+
+def _pydantic_proxy(value: dict, expected_type: type):
+    class_data = value.get('_class_data')
+    model_class = expected_type if class_data is None else resolve_base_model_class(expected_type, class_data)
+    lazy_field_names = _get_pydantic_lazy_field_names(model_class)
+    if lazy_field_names is None:
+        # model validators see all fields at once, only the whole model can be validated
+        logging.debug(f"Deserializing pydantic BaseModel eagerly: {model_class.__name__}")
+        return _build_pydantic_model(model_class)(value)
+    logging.debug(f"Deserializing lazy pydantic BaseModel: {model_class.__name__}")
+    # the proxy passes each field name to the decoder in place of a field type
+    field_names = {name: name for name in model_class.model_fields}
+    return LazyObjectProxy(value, model_class, field_names,
+                           _pydantic_field_decoder(model_class, value, lazy_field_names),
+                           _build_pydantic_model(model_class))
+
+
+def _build_pydantic_model(model_class: type):
+    def build(raw):
+        return model_class.model_validate({k: v for k, v in raw.items() if k != '_class_data'})
+
+    return build
+
+
+def _get_pydantic_lazy_field_names(model_class: type):
+    """
+    :return: the names of the fields of ``model_class`` which may be decoded
+             lazily, or None when the model has model validators.
+    """
+    if model_class not in GLOBAL_PYDANTIC_LAZY_FIELDS_CACHE:
+        decorators = model_class.__pydantic_decorators__
+        if decorators.model_validators:
+            lazy_field_names = None
+        else:
+            validated_names = {name for validator in decorators.field_validators.values()
+                               for name in validator.info.fields}
+            # str_* options of the model config also apply inside containers, e.g. to dict keys
+            transforms_str = any(option.startswith('str_') for option in model_class.model_config)
+            lazy_field_names = frozenset() if '*' in validated_names or transforms_str else frozenset(
+                name for name, field in model_class.model_fields.items()
+                if not field.metadata and name not in validated_names)
+        GLOBAL_PYDANTIC_LAZY_FIELDS_CACHE[model_class] = lazy_field_names
+    return GLOBAL_PYDANTIC_LAZY_FIELDS_CACHE[model_class]
+
+
+def _pydantic_field_decoder(model_class: type, raw: dict, lazy_field_names: frozenset):
+    constructed = []
+
+    def decode(value, name):
+        if name in lazy_field_names:
+            lazy_value = _decode_lazy_pydantic_value(value, model_class.model_fields[name].annotation)
+            if lazy_value is not _UNDECODED:
+                return lazy_value
+        # validate through the model, so field validators, constraints and the model config apply
+        if not constructed:
+            constructed.append(model_class.model_construct(**{k: v for k, v in raw.items() if k != '_class_data'}))
+        model_class.__pydantic_validator__.validate_assignment(constructed[0], name, value)
+        return constructed[0].__dict__[name]
+
+    return decode
+
+
+def _decode_lazy_pydantic_value(value: any, annotation: any):
+    """
+    Return a proxy for a field value holding pydantic models, or ``_UNDECODED``
+    when pydantic has to validate the value itself.
+    """
+    origin_annotation = get_origin(annotation)
+    if origin_annotation in UNION_TYPES:
+        arg_types = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if value is None and len(arg_types) < len(get_args(annotation)):
+            return value
+        # pydantic picks the arm of other unions
+        if len(arg_types) == 1 and value is not None:
+            return _decode_lazy_pydantic_value(value, arg_types[0])
+    elif isinstance(origin_annotation, type) and not issubclass(origin_annotation, (tuple, Set)):
+        if issubclass(origin_annotation, Sequence) and isinstance(value, list) \
+                and _is_pydantic_model_class(get_args(annotation)[0]):
+            return LazyList(value, get_args(annotation)[0], _decode_pydantic_item)
+        if issubclass(origin_annotation, Mapping) and isinstance(value, Mapping) \
+                and get_args(annotation)[0] is str and _is_pydantic_model_class(get_args(annotation)[1]):
+            return LazyMapping(value, str, get_args(annotation)[1], _decode_pydantic_item)
+    elif _is_pydantic_model_class(annotation) and isinstance(value, Mapping):
+        return _pydantic_proxy(value, annotation)
+    return _UNDECODED
+
+
+def _decode_pydantic_item(value: any, annotation: any):
+    # items of a model list or dict follow the rules of their own model class
+    if _is_pydantic_model_class(annotation) and isinstance(value, Mapping):
+        return _pydantic_proxy(value, annotation)
+    return _get_type_adapter(annotation).validate_python(value)
+
+
+def _is_pydantic_model_class(annotation: any) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
+
+def _get_type_adapter(annotation: any) -> TypeAdapter:
+    try:
+        if annotation not in GLOBAL_TYPE_ADAPTER_CACHE:
+            GLOBAL_TYPE_ADAPTER_CACHE[annotation] = TypeAdapter(annotation)
+        return GLOBAL_TYPE_ADAPTER_CACHE[annotation]
+    except TypeError:
+        # unhashable annotations cannot be cached
+        return TypeAdapter(annotation)
@@ -0,0 +1,265 @@
+import base64
+import json
+import re
+import types
+from collections.abc import Sequence, Set, Mapping
+from typing import Union, get_origin, get_args
+
+from flask_sqlalchemy import SQLAlchemy
+from pydantic import BaseModel, TypeAdapter
+
+from .columnar_util import COLUMNAR_KEY, is_columnar, decode_columnar
+from .db_sqlalchemy_instance import default_sqlalchemy_instance as db
+from .logger_setting import pyjson_translator_logging as logging
+from .record_class_util import generate_record_decoder, generate_record_pairs_hook
+from .serialize import deserialize_value
+from .stats_util import with_stats, type_name
+from .union_util import generate_union_dispatch
+
+GLOBAL_TYPE_DECODER_CACHE = {}
+GLOBAL_JSON_TYPE_ADAPTER_CACHE = {}
+
+_PRIMITIVE_TYPES = (int, float, str, bool)
+_UNION_TYPES = (Union, types.UnionType)
+_COLUMNAR_TEXT_PATTERN = re.compile(r'\s*\{\s*"%s"' % COLUMNAR_KEY)
+_COLUMNAR_BYTES_PATTERN = re.compile(_COLUMNAR_TEXT_PATTERN.pattern.encode('utf-8'))
+
+
+@with_stats('loads',
+            lambda data, expected_type=None, *args, **kwargs: type_name(expected_type),
+            lambda data, *args, **kwargs: data)
+def loads_value(data: Union[bytes, str],
+                expected_type: type = None,
+                db_sqlalchemy_instance: SQLAlchemy = db,
+                db_sqlalchemy_merge: bool = False):
+    """
+    Parse JSON text or bytes and decode it into ``expected_type``.
+
+    Equivalent to ``deserialize_value(json.loads(data), expected_type)``, but
+    pydantic model trees are validated by pydantic straight from the JSON
+    text, lists of flat records are built while parsing, and other types use
+    a decoder compiled once per type.
+    """
+    if expected_type is None:
+        return json.loads(data)
+
+    if _is_columnar_text(data):
+        logging.debug(f"Loading columnar JSON: {type_name(expected_type)}")
+        return _loads_columnar(json.loads(data), expected_type, db_sqlalchemy_instance, db_sqlalchemy_merge)
+
+    json_type_adapter = _get_json_type_adapter(expected_type)
+    if json_type_adapter is not None:
+        logging.debug(f"Loading pydantic JSON: {type_name(expected_type)}")
+        return json_type_adapter.validate_json(data)
+
+    record_type, is_sequence = _flat_record_target(expected_type)
+    if record_type is not None:
+        logging.debug(f"Loading flat records while parsing: {type_name(record_type)}")
+        pairs_hook = generate_record_pairs_hook(record_type)
+        record_decoder = compile_type_decoder(record_type)
+        fallback_used = []
+
+        def fallback(pairs):
+            # the hook runs for nested objects too, only objects at record depth are decoded below
+            fallback_used.append(True)
+            return dict(pairs)
+
+        value = json.loads(data, object_pairs_hook=lambda pairs: pairs_hook(pairs, fallback))
+        if fallback_used:
+            def decode_record(item):
+                if item.__class__ is record_type:
+                    return item
+                return record_decoder(item, db_sqlalchemy_instance, db_sqlalchemy_merge)
+
+            value = [decode_record(item) for item in value] if is_sequence else decode_record(value)
+        return list(value) if is_sequence and not isinstance(value, list) else value
+
+    return compile_type_decoder(expected_type)(json.loads(data), db_sqlalchemy_instance, db_sqlalchemy_merge)
+
+
+def _loads_columnar(value: dict, expected_type: type, db_sqlalchemy_instance, db_sqlalchemy_merge):
+    origin_expected_type = get_origin(expected_type)
+    if isinstance(origin_expected_type, type) and issubclass(origin_expected_type, Sequence) \
+            and not issubclass(origin_expected_type, tuple):
+        json_type_adapter = _get_json_type_adapter(expected_type)
+        if json_type_adapter is not None:
+            return json_type_adapter.validate_python(decode_columnar(value))
+
+        record_type, _ = _flat_record_target(expected_type)
+        if record_type is not None:
+            pairs_hook = generate_record_pairs_hook(record_type)
+            record_decoder = compile_type_decoder(record_type)
+
+            def fallback(pairs):
+                return record_decoder(dict(pairs), db_sqlalchemy_instance, db_sqlalchemy_merge)
+
+            columnar = value[COLUMNAR_KEY]
+            fields = columnar['fields']
+            return [pairs_hook(list(zip(fields, row)), fallback) for row in zip(*columnar['columns'])] \
+                if fields else decode_columnar(value)
+    return compile_type_decoder(expected_type)(value, db_sqlalchemy_instance, db_sqlalchemy_merge)
+
+
+def compile_type_decoder(expected_type: type):
+    """
+    Compile ``decode(value, db_sqlalchemy_instance, db_sqlalchemy_merge)`` for
+    ``expected_type``, following the ``deserialize_value`` rules without
+    re-dispatching on every value.
+    """
+    try:
+        if expected_type in GLOBAL_TYPE_DECODER_CACHE:
+            return GLOBAL_TYPE_DECODER_CACHE[expected_type]
+        type_decoder = _compile_type_decoder(expected_type)
+        GLOBAL_TYPE_DECODER_CACHE[expected_type] = type_decoder
+        return type_decoder
+    except TypeError:
+        # unhashable type annotations cannot be cached
+        return _compile_type_decoder(expected_type)
+
+
+def _compile_type_decoder(expected_type: type):
+    if expected_type in _PRIMITIVE_TYPES:
+        def decode_primitive(value, db_sqlalchemy_instance, db_sqlalchemy_merge):
+            return value if value is None or value.__class__ is expected_type else expected_type(value)
+
+        return decode_primitive
+    if expected_type is bytes:
+        def decode_bytes(value, db_sqlalchemy_instance, db_sqlalchemy_merge):
+            return None if value is None else base64.b64decode(value.encode('utf-8'))
+
+        return decode_bytes
+    if expected_type is complex:
+        def decode_complex(value, db_sqlalchemy_instance, db_sqlalchemy_merge):
+            return None if value is None else complex(value['real'], value['imaginary'])
+
+        return decode_complex
+
+    origin_expected_type = get_origin(expected_type)
+    if origin_expected_type in _UNION_TYPES:
+        arg_types = [arg for arg in get_args(expected_type) if arg is not type(None)]
+        if len(arg_types) == 1:
+            return _none_safe(compile_type_decoder(arg_types[0]))
+        return _none_safe(_compile_union_decoder(expected_type))
+    elif isinstance(origin_expected_type, type):
+        item_decoder = compile_type_decoder(get_args(expected_type)[0]) if get_args(expected_type) else None
+        if issubclass(origin_expected_type, tuple) and item_decoder:
+            return _none_safe(_columnar_safe(lambda value, db_instance, db_merge:
+                                             tuple([item_decoder(item, db_instance, db_merge) for item in value])))
+        if issubclass(origin_expected_type, Sequence) and item_decoder:
+            return _none_safe(_columnar_safe(_compile_list_decoder(get_args(expected_type)[0], item_decoder)))
+        if issubclass(origin_expected_type, Set) and item_decoder:
+            return _none_safe(_columnar_safe(lambda value, db_instance, db_merge:
+                                             {item_decoder(item, db_instance, db_merge) for item in value}))
+        if issubclass(origin_expected_type, Mapping) and len(get_args(expected_type)) == 2:
+            key_decoder = item_decoder
+            value_decoder = compile_type_decoder(get_args(expected_type)[1])
+            return _none_safe(lambda value, db_instance, db_merge:
+                              {key_decoder(k, db_instance, db_merge): value_decoder(v, db_instance, db_merge)
+                               for k, v in value.items()})
+    else:
+        record_decoder = generate_record_decoder(expected_type)
+        if record_decoder:
+            return _none_safe(lambda value, db_instance, db_merge:
+                              record_decoder(value, _decode_compiled, db_instance, db_merge))
+
+    def decode_fallback(value, db_sqlalchemy_instance, db_sqlalchemy_merge):
+        return deserialize_value(value, expected_type, db_sqlalchemy_instance, db_sqlalchemy_merge)
+
+    return decode_fallback
+
+
+def _compile_list_decoder(item_type: type, item_decoder):
+    if item_type in _PRIMITIVE_TYPES:
+        def decode_primitive_list(value, db_sqlalchemy_instance, db_sqlalchemy_merge):
+            # json.loads already built a fresh list, reuse it when no item needs converting
+            if all(item.__class__ is item_type for item in value):
+                return value
+            return [item_decoder(item, db_sqlalchemy_instance, db_sqlalchemy_merge) for item in value]
+
+        return decode_primitive_list
+
+    def decode_list(value, db_sqlalchemy_instance, db_sqlalchemy_merge):
+        return [item_decoder(item, db_sqlalchemy_instance, db_sqlalchemy_merge) for item in value]
+
+    return decode_list
+
+
+def _compile_union_decoder(union_type: type):
+    union_dispatch = generate_union_dispatch(union_type)
+    arm_decoders = {arm: compile_type_decoder(arm) for arm in union_dispatch.arm_types}
+
+    def decode_union(value, db_sqlalchemy_instance, db_sqlalchemy_merge):
+        union_arm = union_dispatch.select_arm(value)
+        if union_arm is None:
+            return deserialize_value(value, union_type, db_sqlalchemy_instance, db_sqlalchemy_merge)
+        return arm_decoders[union_arm](value, db_sqlalchemy_instance, db_sqlalchemy_merge)
+
+    return decode_union
+
+
+def _none_safe(type_decoder):
+    def decode(value, db_sqlalchemy_instance, db_sqlalchemy_merge):
+        if value is None:
+            return value
+        return type_decoder(value, db_sqlalchemy_instance, db_sqlalchemy_merge)
+
+    return decode
+
+
+def _columnar_safe(type_decoder):
+    def decode(value, db_sqlalchemy_instance, db_sqlalchemy_merge):
+        if is_columnar(value):
+            value = decode_columnar(value)
+        return type_decoder(value, db_sqlalchemy_instance, db_sqlalchemy_merge)
+
+    return decode
+
+
+def _is_columnar_text(data: Union[bytes, str]) -> bool:
+    pattern = _COLUMNAR_BYTES_PATTERN if isinstance(data, (bytes, bytearray)) else _COLUMNAR_TEXT_PATTERN
+    return pattern.match(data) is not None
+
+
+def _decode_compiled(value, expected_type, db_sqlalchemy_instance, db_sqlalchemy_merge):
+    return compile_type_decoder(expected_type)(value, db_sqlalchemy_instance, db_sqlalchemy_merge)
+
+
+def _flat_record_target(expected_type: type):
+    origin_expected_type = get_origin(expected_type)
+    if isinstance(origin_expected_type, type) and issubclass(origin_expected_type, Sequence) \
+            and not issubclass(origin_expected_type, tuple) and get_args(expected_type):
+        record_type = get_args(expected_type)[0]
+        return (record_type, True) if generate_record_pairs_hook(record_type) else (None, False)
+    if generate_record_pairs_hook(expected_type):
+        return expected_type, False
+    return None, False
+
+
+def _get_json_type_adapter(expected_type: type):
+    try:
+        if expected_type not in GLOBAL_JSON_TYPE_ADAPTER_CACHE:
+            GLOBAL_JSON_TYPE_ADAPTER_CACHE[expected_type] = \
+                TypeAdapter(expected_type) if _is_pydantic_tree(expected_type) else None
+        return GLOBAL_JSON_TYPE_ADAPTER_CACHE[expected_type]
+    except TypeError:
+        return None
+
+
+def _is_pydantic_tree(expected_type: type) -> bool:
+    # only types where pydantic validation matches deserialize_value: models whose
+    # _class_data can only name the model itself, inside lists, dicts and Optional
+    if isinstance(expected_type, type) and issubclass(expected_type, BaseModel):
+        # extra='allow' would keep _class_data as a field and 'forbid' rejects it
+        return not expected_type.__subclasses__() and expected_type.model_config.get('extra') in (None, 'ignore')
+    origin_expected_type = get_origin(expected_type)
+    arg_types = get_args(expected_type)
+    if origin_expected_type in _UNION_TYPES:
+        arg_types = [arg for arg in arg_types if arg is not type(None)]
+        return len(arg_types) == 1 and _is_pydantic_tree(arg_types[0])
+    if not isinstance(origin_expected_type, type) or issubclass(origin_expected_type, (tuple, Set)):
+        return False
+    if issubclass(origin_expected_type, Sequence):
+        return len(arg_types) == 1 and _is_pydantic_tree(arg_types[0])
+    if issubclass(origin_expected_type, Mapping):
+        return len(arg_types) == 2 and arg_types[0] in _PRIMITIVE_TYPES and _is_pydantic_tree(arg_types[1])
+    return False
@@ -1,12 +1,22 @@
+import decimal
+
 from flask_sqlalchemy import SQLAlchemy
-from marshmallow import fields
-from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
+from marshmallow import fields, missing, validate
+from marshmallow_sqlalchemy import SQLAlchemyAutoSchema, SQLAlchemySchema
 
 from .db_sqlalchemy_instance import default_sqlalchemy_instance as db
 from .error_handle import fail_to_translator
+from .projection_util import Projection, projection_to_marshmallow_options
+from .schema_cache_util import get_schema_cache_dir, load_schema_spec, save_schema_spec
+from .stats_util import with_stats, type_name
+from .type_path_util import type_path, resolve_type_path
 
 GLOBAL_DB_SCHEMA_CACHE = {}
 
+SCHEMA_CACHE_DEPENDENCIES = ('marshmallow', 'marshmallow-sqlalchemy', 'sqlalchemy')
+# scalar constructor options of the marshmallow fields generated for columns
+SIMPLE_FIELD_OPTIONS = ('strict', 'as_string', 'places', 'rounding', 'allow_nan', 'format')
+
 
 def generate_db_schema(input_class_instance: any,
                        db_sqlalchemy_instance: SQLAlchemy = db,
@@ -21,32 +31,102 @@ def generate_db_schema(input_class_instance: any,
         related_instance = related_model()
         return generate_db_schema(related_instance, db_sqlalchemy_instance, db_sqlalchemy_merge)
 
+    cached_spec = load_schema_spec('marshmallow', input_db_class, SCHEMA_CACHE_DEPENDENCIES)
+    column_fields = None if cached_spec is None else build_column_fields(cached_spec['columns'])
+    relationships = input_db_class.__mapper__.relationships
+    if column_fields is not None:
+        relationship_names = cached_spec['relationships']
+    else:
+        relationship_names = [attr_name for attr_name, relation in relationships.items() if relation.uselist]
+
     schema_fields = {}
-    for attr_name, relation in input_db_class.__mapper__.relationships.items():
-        if relation.uselist:
-            nested_db_schema = get_nested_schema(relation)
-            if nested_db_schema:
-                schema_fields[attr_name] = fields.Nested(nested_db_schema, many=True)
+    for attr_name in relationship_names:
+        nested_db_schema = get_nested_schema(relationships[attr_name])
+        if nested_db_schema:
+            schema_fields[attr_name] = fields.Nested(nested_db_schema, many=True)
 
     class Meta:
         model = input_db_class
         load_instance = db_sqlalchemy_merge
         sqla_session = db_sqlalchemy_instance.session
 
-    schema_class = type(f"{input_db_class.__name__}Schema", (SQLAlchemyAutoSchema,),
-                        {"Meta": Meta, **schema_fields})
+    if column_fields is not None:
+        # the column fields come from the on-disk snapshot, skip model introspection
+        schema_class = type(f"{input_db_class.__name__}Schema", (SQLAlchemySchema,),
+                            {"Meta": Meta, **column_fields, **schema_fields})
+    else:
+        schema_class = type(f"{input_db_class.__name__}Schema", (SQLAlchemyAutoSchema,),
+                            {"Meta": Meta, **schema_fields})
+        column_specs = dump_column_fields(schema_class, schema_fields) if get_schema_cache_dir() else None
+        if column_specs is not None:
+            save_schema_spec('marshmallow', input_db_class,
+                             {'columns': column_specs, 'relationships': relationship_names},
+                             SCHEMA_CACHE_DEPENDENCIES)
 
     GLOBAL_DB_SCHEMA_CACHE[input_db_class] = schema_class
     return schema_class
 
 
+def dump_column_fields(schema_class: type, nested_fields: dict):
+    column_specs = {}
+    for field_name, field in schema_class._declared_fields.items():
+        if field_name in nested_fields:
+            continue
+        if field.load_default is not missing or field.dump_default is not missing:
+            return None
+        field_spec = {
+            'class': type_path(type(field)),
+            'options': {option: getattr(field, option) for option in
+                        ('required', 'allow_none', 'dump_only', 'load_only', 'data_key', 'attribute')},
+            'extra': {option: getattr(field, option) for option in SIMPLE_FIELD_OPTIONS if option in vars(field)},
+            'validators': [],
+        }
+        if isinstance(field_spec['extra'].get('places'), decimal.Decimal):
+            # fields.Decimal keeps places as a quantize exponent, store the constructor argument
+            field_spec['extra']['places'] = -field_spec['extra']['places'].as_tuple().exponent
+        if not all(_is_json_scalar(value) for value in field_spec['extra'].values()):
+            return None
+        for validator in field.validators:
+            if type(validator) is validate.Length:
+                field_spec['validators'].append({'class': 'Length', 'min': validator.min,
+                                                 'max': validator.max, 'equal': validator.equal})
+            elif type(validator) is validate.OneOf and all(_is_json_scalar(c) for c in validator.choices):
+                field_spec['validators'].append({'class': 'OneOf', 'choices': list(validator.choices)})
+            else:
+                return None
+        column_specs[field_name] = field_spec
+    return column_specs
+
+
+def build_column_fields(column_specs: dict):
+    column_fields = {}
+    for field_name, field_spec in column_specs.items():
+        field_class = resolve_type_path(field_spec['class'])
+        if not isinstance(field_class, type) or not issubclass(field_class, fields.Field):
+            return None
+        validators = [validate.Length(min=validator['min'], max=validator['max'], equal=validator['equal'])
+                      if validator['class'] == 'Length' else validate.OneOf(validator['choices'])
+                      for validator in field_spec['validators']]
+        column_fields[field_name] = field_class(validate=validators, **field_spec['options'], **field_spec['extra'])
+    return column_fields
+
+
+def _is_json_scalar(value: any) -> bool:
+    return value is None or isinstance(value, (int, float, str, bool))
+
+
+@with_stats('orm_to_dict', lambda instance, *args, **kwargs: type_name(type(instance)))
 def orm_class_to_dict(instance: any,
                       db_sqlalchemy_instance: SQLAlchemy = db,
-                      db_sqlalchemy_merge: bool = False):
-    schema = generate_db_schema(instance, db_sqlalchemy_instance, db_sqlalchemy_merge)()
+                      db_sqlalchemy_merge: bool = False,
+                      include: Projection = None,
+                      exclude: Projection = None):
+    schema_class = generate_db_schema(instance, db_sqlalchemy_instance, db_sqlalchemy_merge)
+    schema = schema_class(**projection_to_marshmallow_options(include, exclude, schema_class))
     return schema.dump(instance)
 
 
+@with_stats('orm_from_dict', lambda cls, *args, **kwargs: type_name(cls))
 def orm_class_from_dict(cls: type,
                         data: any,
                         db_sqlalchemy_instance: SQLAlchemy = db,
@@ -0,0 +1,124 @@
+from collections.abc import Mapping
+from typing import Union, Optional
+
+from sqlalchemy.orm import load_only, noload, selectinload
+
+from .error_handle import fail_to_translator
+
+# A projection is a set of field names, or a dict mapping field names to True
+# or to a nested projection, the same shape pydantic accepts for model_dump.
+Projection = Union[set, frozenset, list, tuple, Mapping]
+
+
+def normalize_projection(projection: Optional[Projection]) -> Optional[Mapping]:
+    if projection is None or isinstance(projection, Mapping):
+        return projection
+    if isinstance(projection, (set, frozenset, list, tuple)):
+        return {name: True for name in projection}
+    fail_to_translator(f"Unhandled projection type {type(projection).__name__}")
+
+
+def is_field_included(name: str,
+                      include: Optional[Mapping],
+                      exclude: Optional[Mapping]) -> bool:
+    if include is not None and name not in include:
+        return False
+    if exclude is not None and _is_whole_field(exclude.get(name)):
+        return False
+    return True
+
+
+def sub_projection(projection: Optional[Mapping], name: str) -> Optional[Mapping]:
+    if projection is None:
+        return None
+    nested = projection.get(name)
+    if nested is None or _is_whole_field(nested):
+        return None
+    return normalize_projection(nested)
+
+
+def projection_to_marshmallow_options(include: Optional[Projection] = None,
+                                      exclude: Optional[Projection] = None,
+                                      schema_class: type = None) -> dict:
+    """
+    Translate a projection into ``only`` / ``exclude`` schema options.
+
+    With ``schema_class``, names which are not fields of the schema are left
+    out, the same way the pydantic, record and object paths ignore them.
+    """
+    schema_options = {}
+    if include is not None:
+        schema_options['only'] = tuple(_dotted_field_names(normalize_projection(include)))
+    if exclude is not None:
+        schema_options['exclude'] = tuple(_dotted_field_names(normalize_projection(exclude), leaves_only=True))
+    if schema_class is not None:
+        schema_options = {option: tuple(name for name in names if _is_schema_field_path(schema_class, name))
+                          for option, names in schema_options.items()}
+    return schema_options
+
+
+def generate_query_options(sqlalchemy_model: type,
+                           include: Optional[Projection] = None,
+                           exclude: Optional[Projection] = None) -> list:
+    """
+    Translate a projection into loader options for ``sqlalchemy_model``.
+
+    Columns outside the projection are left out with ``load_only``, included
+    relationships are loaded with ``selectinload`` and everything else is
+    marked ``noload``, recursively for nested projections.
+    """
+    include = normalize_projection(include)
+    exclude = normalize_projection(exclude)
+    if include is None and exclude is None:
+        return []
+    mapper = sqlalchemy_model.__mapper__
+
+    column_names = [name for name in mapper.column_attrs.keys() if is_field_included(name, include, exclude)]
+    if not column_names:
+        column_names = [mapper.get_property_by_column(column).key for column in mapper.primary_key]
+    query_options = [load_only(*[getattr(sqlalchemy_model, name) for name in column_names])]
+
+    for attr_name, relation in mapper.relationships.items():
+        relation_attr = getattr(sqlalchemy_model, attr_name)
+        if not is_field_included(attr_name, include, exclude):
+            query_options.append(noload(relation_attr))
+            continue
+        nested_options = generate_query_options(relation.mapper.entity,
+                                                sub_projection(include, attr_name),
+                                                sub_projection(exclude, attr_name))
+        query_options.append(selectinload(relation_attr).options(*nested_options))
+    return query_options
+
+
+def apply_query_projection(query: any,
+                           sqlalchemy_model: type,
+                           include: Optional[Projection] = None,
+                           exclude: Optional[Projection] = None):
+    """
+    Apply a projection to a ``Select`` or legacy ``Query`` so unneeded columns
+    and relationships are never fetched.
+    """
+    return query.options(*generate_query_options(sqlalchemy_model, include, exclude))
+
+
+def _is_whole_field(value) -> bool:
+    return value is True or value is Ellipsis
+
+
+def _is_schema_field_path(schema_class: type, dotted_name: str) -> bool:
+    for name in dotted_name.split('.'):
+        field = schema_class._declared_fields.get(name) if isinstance(schema_class, type) else None
+        if field is None:
+            return False
+        schema_class = getattr(field, 'nested', None)
+    return True
+
+
+def _dotted_field_names(projection: Mapping, prefix: str = "", leaves_only: bool = False):
+    for name, nested in projection.items():
+        nested_names = [] if _is_whole_field(nested) else list(
+            _dotted_field_names(normalize_projection(nested), f"{prefix}{name}.", leaves_only))
+        if nested_names:
+            yield from nested_names
+        elif _is_whole_field(nested) or not leaves_only:
+            yield f"{prefix}{name}"
@@ -1,8 +1,17 @@
-from typing import List
+from collections.abc import Mapping
+from typing import List, Optional
 
 from pydantic import BaseModel, create_model, ConfigDict
 from sqlalchemy import TypeDecorator
 
+from .projection_util import (
+    Projection,
+    normalize_projection,
+    is_field_included,
+    sub_projection
+)
+from .stats_util import with_stats, type_name
+
 GLOBAL_DB_SCHEMA_CACHE = {}
 
 
@@ -49,13 +58,24 @@ def generate_db_schema(sqlalchemy_model):
     return pydantic_model
 
 
-def convert_instance_to_pydantic(instance):
+def convert_instance_to_pydantic(instance,
+                                 include: Projection = None,
+                                 exclude: Projection = None):
     model_class = generate_db_schema(instance.__class__)
     instance_dict = instance.__dict__.copy()
+    include = normalize_projection(include)
+    exclude = normalize_projection(exclude)
     for attr_name, relation in instance.__mapper__.relationships.items():
-        if relation.uselist:
-            instance_dict[attr_name] = [convert_instance_to_pydantic(related_instance) for related_instance in
-                                        getattr(instance, attr_name)]
+        if not relation.uselist:
+            continue
+        if not is_field_included(attr_name, include, exclude):
+            # skip the relationship so it is never lazy loaded
+            instance_dict.pop(attr_name, None)
+            continue
+        instance_dict[attr_name] = [convert_instance_to_pydantic(related_instance,
+                                                                 sub_projection(include, attr_name),
+                                                                 sub_projection(exclude, attr_name))
+                                    for related_instance in getattr(instance, attr_name)]
     return model_class(**instance_dict)
 
 
@@ -79,11 +99,40 @@ def pydantic_to_sqlalchemy(pydantic_instance):
     return sqlalchemy_instance
 
 
-def orm_class_to_dict(instance: any):
-    instance_dict = convert_instance_to_pydantic(instance).model_dump()
+@with_stats('orm_to_dict', lambda instance, *args, **kwargs: type_name(type(instance)))
+def orm_class_to_dict(instance: any,
+                      include: Projection = None,
+                      exclude: Projection = None):
+    include = normalize_projection(include)
+    exclude = normalize_projection(exclude)
+    pydantic_instance = convert_instance_to_pydantic(instance, include, exclude)
+    instance_dict = pydantic_instance.model_dump(include=pydantic_projection(type(instance), include),
+                                                 exclude=pydantic_projection(type(instance), exclude))
     return instance_dict
 
 
+def pydantic_projection(sqlalchemy_model: type, projection: Optional[Mapping]) -> Optional[Mapping]:
+    """
+    Adapt a projection to ``model_dump``, which reads nested projections of
+    list fields as item indexes: those of ``uselist`` relationships apply to
+    every item through ``'__all__'``.
+    """
+    if projection is None:
+        return None
+    relationships = sqlalchemy_model.__mapper__.relationships
+    adapted_projection = {}
+    for name in projection:
+        nested = sub_projection(projection, name)
+        if nested is not None and name in relationships:
+            relation = relationships[name]
+            nested = pydantic_projection(relation.mapper.class_, nested)
+            adapted_projection[name] = {'__all__': nested} if relation.uselist else nested
+        else:
+            adapted_projection[name] = projection[name] if nested is None else nested
+    return adapted_projection
+
+
+@with_stats('orm_from_dict', lambda cls, *args, **kwargs: type_name(cls))
 def orm_class_from_dict(cls: type,
                         data: any):
     model_class = generate_db_schema(cls)
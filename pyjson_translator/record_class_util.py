@@ -0,0 +1,317 @@
+import dataclasses
+import types
+import typing
+from collections.abc import Sequence, Set, Mapping
+from typing import Any, get_origin, get_type_hints
+
+from .error_handle import fail_to_translator
+
+GLOBAL_RECORD_ENCODER_CACHE = {}
+GLOBAL_RECORD_DECODER_CACHE = {}
+GLOBAL_CONSTRUCTOR_PARAMS_CACHE = {}
+GLOBAL_FIELD_TYPE_HINTS_CACHE = {}
+GLOBAL_RECORD_PAIRS_HOOK_CACHE = {}
+
+_PRIMITIVE_TYPES = (int, float, str, bool)
+
+
+def is_named_tuple_class(cls: type) -> bool:
+    return isinstance(cls, type) and issubclass(cls, tuple) and hasattr(cls, '_fields')
+
+
+def get_slot_names(cls: type) -> list:
+    slot_names = []
+    for klass in reversed(cls.__mro__):
+        slots = klass.__dict__.get('__slots__', ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        for slot in slots:
+            slot = _mangle_slot_name(klass, slot)
+            if slot not in ('__dict__', '__weakref__') and slot not in slot_names:
+                slot_names.append(slot)
+    return slot_names
+
+
+def _mangle_slot_name(klass: type, slot: str) -> str:
+    # private slots are stored under the class-mangled name, as self.__x is
+    class_name = klass.__name__.lstrip('_')
+    if slot.startswith('__') and not slot.endswith('__') and class_name:
+        return f"_{class_name}{slot}"
+    return slot
+
+
+def is_slots_class(cls: type) -> bool:
+    if not isinstance(cls, type) or '__slots__' not in cls.__dict__:
+        return False
+    for klass in cls.__mro__[:-1]:
+        # any class in the hierarchy without __slots__ gives instances a __dict__
+        if '__slots__' not in klass.__dict__:
+            return False
+        slots = klass.__dict__['__slots__']
+        if '__dict__' in ((slots,) if isinstance(slots, str) else slots):
+            return False
+    return True
+
+
+def is_record_class(cls: type) -> bool:
+    if not isinstance(cls, type) or hasattr(cls, '__mapper__'):
+        return False
+    return dataclasses.is_dataclass(cls) or is_named_tuple_class(cls) or is_slots_class(cls)
+
+
+def get_constructor_params(cls: type) -> tuple:
+    if cls in GLOBAL_CONSTRUCTOR_PARAMS_CACHE:
+        return GLOBAL_CONSTRUCTOR_PARAMS_CACHE[cls]
+
+    init_code = cls.__init__.__code__
+    constructor_params = init_code.co_varnames[1:init_code.co_argcount]
+    GLOBAL_CONSTRUCTOR_PARAMS_CACHE[cls] = constructor_params
+    return constructor_params
+
+
+def get_field_type_hints(cls: type) -> dict:
+    if cls in GLOBAL_FIELD_TYPE_HINTS_CACHE:
+        return GLOBAL_FIELD_TYPE_HINTS_CACHE[cls]
+
+    try:
+        type_hints = get_type_hints(cls)
+    except Exception:
+        # unresolved forward references, fall back to passing raw values through
+        type_hints = {}
+    field_type_hints = {name: hint for name, hint in type_hints.items() if _is_decodable_hint(hint)}
+    GLOBAL_FIELD_TYPE_HINTS_CACHE[cls] = field_type_hints
+    return field_type_hints
+
+
+def _is_decodable_hint(hint) -> bool:
+    if hint is Any or isinstance(hint, (str, typing.ForwardRef, typing.TypeVar)):
+        return False
+    if isinstance(hint, type):
+        return True
+    # only the generic origins deserialize_value dispatches on, e.g. not Literal
+    origin = get_origin(hint)
+    return origin in (typing.Union, types.UnionType) \
+        or isinstance(origin, type) and issubclass(origin, (tuple, Sequence, Set, Mapping))
+
+
+def _compile(source: str, namespace: dict, func_name: str):
+    exec(compile(source, f"<pyjson_translator {func_name}>", 'exec'), namespace)
+    return namespace[func_name]
+
+
+def get_record_field_names(cls: type) -> list:
+    if dataclasses.is_dataclass(cls):
+        return [field.name for field in dataclasses.fields(cls)]
+    if is_named_tuple_class(cls):
+        return list(cls._fields)
+    return get_slot_names(cls)
+
+
+def get_constructor_keys(cls: type, param_names: list) -> dict:
+    """
+    Map constructor parameters to the keys the encoder writes, which differ
+    for private slots: ``__init__(self, secret)`` setting ``self.__secret``
+    is encoded under ``_Cls__secret``.
+    """
+    if dataclasses.is_dataclass(cls) or not is_slots_class(cls):
+        return {name: name for name in param_names}
+    slot_names = get_slot_names(cls)
+    constructor_keys = {}
+    for name in param_names:
+        private_names = [_mangle_slot_name(klass, f"__{name}") for klass in cls.__mro__]
+        constructor_keys[name] = name if name in slot_names else next(
+            (private_name for private_name in private_names if private_name in slot_names), name)
+    return constructor_keys
+
+
+def generate_record_encoder(cls: type):
+    """
+    Generate an encoder for a dataclass, ``__slots__`` class or NamedTuple.
+
+    The encoder reads every field with straight-line attribute access and only
+    falls back to ``serialize`` for non-primitive field values. NamedTuples are
+    encoded positionally as a list, like any other tuple.
+
+    :return: ``encode(value, serialize, db_sqlalchemy_instance, db_sqlalchemy_merge)``,
+             or None if ``cls`` is not a record class.
+    """
+    if cls in GLOBAL_RECORD_ENCODER_CACHE:
+        return GLOBAL_RECORD_ENCODER_CACHE[cls]
+
+    if not is_record_class(cls):
+        GLOBAL_RECORD_ENCODER_CACHE[cls] = None
+        return None
+
+    field_names = get_record_field_names(cls)
+    namespace = {
+        '_primitive_types': frozenset(_PRIMITIVE_TYPES),
+        '_fail': fail_to_translator,
+        '_unset_message': f"Unset field when serializing '{cls.__name__}': ",
+    }
+    lines = ["def encode(value, serialize, db_instance, db_merge):"]
+    if field_names:
+        lines.append("    try:")
+        for index, name in enumerate(field_names):
+            lines.append(f"        v{index} = value.{name}")
+        lines.append("    except AttributeError as e:")
+        lines.append("        _fail(_unset_message + str(e))")
+    for index, name in enumerate(field_names):
+        lines.append(f"    if v{index} is not None and v{index}.__class__ not in _primitive_types:")
+        lines.append(f"        v{index} = serialize(v{index}, db_instance, db_merge)")
+    if is_named_tuple_class(cls):
+        items = ", ".join(f"v{index}" for index in range(len(field_names)))
+        lines.append(f"    return [{items}]")
+    else:
+        items = ", ".join(f"{name!r}: v{index}" for index, name in enumerate(field_names))
+        lines.append(f"    return {{{items}}}")
+
+    encoder = _compile("\n".join(lines), namespace, 'encode')
+    GLOBAL_RECORD_ENCODER_CACHE[cls] = encoder
+    return encoder
+
+
+def generate_record_decoder(cls: type):
+    """
+    Generate a decoder for a dataclass, ``__slots__`` class or NamedTuple.
+
+    Annotated fields are decoded with ``deserialize`` using their type hint,
+    unless the value already has the primitive type of the hint. Other fields
+    are passed through as-is. The target is constructed in a single call.
+
+    :return: ``decode(value, deserialize, db_sqlalchemy_instance, db_sqlalchemy_merge)``,
+             or None if ``cls`` is not a record class.
+    """
+    if cls in GLOBAL_RECORD_DECODER_CACHE:
+        return GLOBAL_RECORD_DECODER_CACHE[cls]
+
+    if not is_record_class(cls):
+        GLOBAL_RECORD_DECODER_CACHE[cls] = None
+        return None
+
+    type_hints = get_field_type_hints(cls)
+    namespace = {
+        '_cls': cls,
+        '_fail': fail_to_translator,
+        '_missing_message': f"Missing required parameters for initializing '{cls.__name__}': ",
+        '_too_many_message': f"Too many values for initializing '{cls.__name__}'",
+    }
+
+    def decode_expression(name, source):
+        if name not in type_hints:
+            return source
+        namespace[f"_t_{name}"] = type_hints[name]
+        primitive_type = _primitive_hint(type_hints[name])
+        if primitive_type is None:
+            return f"deserialize({source}, _t_{name}, db_instance, db_merge)"
+        # values already of the primitive type need no deserialize dispatch
+        namespace[f"_p_{name}"] = primitive_type
+        condition = f"(v_{name} := {source}).__class__ is _p_{name}"
+        if primitive_type is not type_hints[name]:
+            condition = f"(v_{name} := {source}) is None or v_{name}.__class__ is _p_{name}"
+        return f"(v_{name} if {condition} else deserialize(v_{name}, _t_{name}, db_instance, db_merge))"
+
+    lines = ["def decode(value, deserialize, db_instance, db_merge):"]
+    if is_named_tuple_class(cls):
+        field_names = list(cls._fields)
+        required = [name for name in field_names if name not in cls._field_defaults]
+        namespace['_fields'] = field_names
+        lines.append("    size = len(value)")
+        lines.append(f"    if size < {len(required)}:")
+        lines.append(f"        _fail(_missing_message + ', '.join(_fields[size:{len(required)}]))")
+        lines.append(f"    if size > {len(field_names)}:")
+        lines.append("        _fail(_too_many_message)")
+        for index, name in enumerate(field_names):
+            if index >= len(required):
+                lines.append(f"    if size == {index}:")
+                lines.append(f"        return _cls({''.join(f'f{i}, ' for i in range(index))})")
+            lines.append(f"    f{index} = {decode_expression(name, f'value[{index}]')}")
+        lines.append(f"    return _cls({''.join(f'f{i}, ' for i in range(len(field_names)))})")
+    else:
+        if dataclasses.is_dataclass(cls):
+            init_fields = [field for field in dataclasses.fields(cls) if field.init]
+            field_names = [field.name for field in init_fields]
+            required = [field.name for field in init_fields
+                        if field.default is dataclasses.MISSING
+                        and field.default_factory is dataclasses.MISSING]
+        else:
+            field_names = list(get_constructor_params(cls))
+            required = field_names
+        keys = get_constructor_keys(cls, field_names)
+        # annotations of private slots are mangled like the slots themselves
+        type_hints = {**{name: type_hints[key] for name, key in keys.items() if key in type_hints}, **type_hints}
+        namespace['_required'] = frozenset(keys[name] for name in required)
+
+        lines.append("    if not _required <= value.keys():")
+        lines.append(f"        _fail(_missing_message + ', '.join(name for name, key in "
+                     f"{[(name, keys[name]) for name in required]!r} if key not in value))")
+        required_items = ", ".join(f"{name!r}: {decode_expression(name, f'value[{keys[name]!r}]')}"
+                                   for name in required)
+        optional_names = [name for name in field_names if name not in required]
+        if not optional_names:
+            lines.append(f"    return _cls(**{{{required_items}}})")
+        else:
+            lines.append(f"    kwargs = {{{required_items}}}")
+            for name in optional_names:
+                lines.append(f"    if {keys[name]!r} in value:")
+                lines.append(f"        kwargs[{name!r}] = {decode_expression(name, f'value[{keys[name]!r}]')}")
+            lines.append("    return _cls(**kwargs)")
+
+    decoder = _compile("\n".join(lines), namespace, 'decode')
+    GLOBAL_RECORD_DECODER_CACHE[cls] = decoder
+    return decoder
+
+
+def generate_record_pairs_hook(cls: type):
+    """
+    Generate a ``json.loads`` ``object_pairs_hook`` building ``cls`` straight
+    from the parsed key/value pairs, without an intermediate dict.
+
+    Only flat records qualify: every constructor field is annotated with a
+    primitive type, so no other JSON object can appear inside the record.
+    Pairs with unexpected keys are passed to ``fallback``.
+
+    :return: ``hook(pairs, fallback)``, or None if ``cls`` does not qualify.
+    """
+    if cls in GLOBAL_RECORD_PAIRS_HOOK_CACHE:
+        return GLOBAL_RECORD_PAIRS_HOOK_CACHE[cls]
+
+    GLOBAL_RECORD_PAIRS_HOOK_CACHE[cls] = None
+    if not is_record_class(cls) or is_named_tuple_class(cls):
+        return None
+    if dataclasses.is_dataclass(cls):
+        field_names = [field.name for field in dataclasses.fields(cls) if field.init]
+        if len(field_names) != len(dataclasses.fields(cls)):
+            return None
+    else:
+        field_names = list(get_constructor_params(cls))
+    type_hints = get_field_type_hints(cls)
+    field_types = [_primitive_hint(type_hints.get(name)) for name in field_names]
+    if not field_names or None in field_types:
+        return None
+
+    namespace = {'_cls': cls}
+    keys = get_constructor_keys(cls, field_names)
+    key_checks = " or ".join(f"pairs[{index}][0] != {keys[name]!r}" for index, name in enumerate(field_names))
+    lines = ["def hook(pairs, fallback):",
+             f"    if len(pairs) != {len(field_names)} or {key_checks}:",
+             "        return fallback(pairs)"]
+    for index, field_type in enumerate(field_types):
+        namespace[f"_t{index}"] = field_type
+        lines.append(f"    v{index} = pairs[{index}][1]")
+        lines.append(f"    if v{index}.__class__ is not _t{index} and v{index} is not None:")
+        lines.append(f"        v{index} = _t{index}(v{index})")
+    lines.append(f"    return _cls({', '.join(f'{name}=v{index}' for index, name in enumerate(field_names))})")
+
+    pairs_hook = _compile("\n".join(lines), namespace, 'hook')
+    GLOBAL_RECORD_PAIRS_HOOK_CACHE[cls] = pairs_hook
+    return pairs_hook
+
+
+def _primitive_hint(hint):
+    if hint in _PRIMITIVE_TYPES:
+        return hint
+    if get_origin(hint) in (typing.Union, types.UnionType):
+        arg_types = [arg for arg in typing.get_args(hint) if arg is not type(None)]
+        if len(arg_types) == 1 and arg_types[0] in _PRIMITIVE_TYPES:
+            return arg_types[0]
+    return None
@@ -0,0 +1,123 @@
+import functools
+import hashlib
+import json
+import os
+import tempfile
+from importlib import metadata
+from typing import Optional
+
+from .logger_setting import pyjson_translator_logging as logging
+
+SCHEMA_CACHE_FORMAT_VERSION = 1
+SCHEMA_CACHE_DIR_ENV = 'PYJSON_TRANSLATOR_SCHEMA_CACHE_DIR'
+
+_schema_cache_dir = os.environ.get(SCHEMA_CACHE_DIR_ENV)
+
+
+def set_schema_cache_dir(path: Optional[str]):
+    """
+    Set the directory of the on-disk ORM schema cache, None disables it.
+
+    It defaults to the ``PYJSON_TRANSLATOR_SCHEMA_CACHE_DIR`` environment variable.
+    """
+    global _schema_cache_dir
+    _schema_cache_dir = path
+
+
+def get_schema_cache_dir() -> Optional[str]:
+    return _schema_cache_dir
+
+
+def model_definition_hash(sqlalchemy_model: type, dependencies: tuple = ()) -> str:
+    """
+    Hash the mapped table definition of ``sqlalchemy_model``: columns, types,
+    defaults, foreign keys and relationships, plus the versions of the
+    libraries the cached spec is derived with.
+    """
+    columns = [[column.name,
+                _type_repr(column.type),
+                column.nullable,
+                column.primary_key,
+                _default_repr(column.default),
+                None if column.server_default is None else str(getattr(column.server_default, 'arg', '')),
+                sorted(foreign_key.target_fullname for foreign_key in column.foreign_keys)]
+               for column in sqlalchemy_model.__table__.columns]
+    relationships = [[attr_name,
+                      f"{relation.mapper.class_.__module__}.{relation.mapper.class_.__qualname__}",
+                      relation.uselist]
+                     for attr_name, relation in sqlalchemy_model.__mapper__.relationships.items()]
+    definition = {
+        'format': SCHEMA_CACHE_FORMAT_VERSION,
+        'model': f"{sqlalchemy_model.__module__}.{sqlalchemy_model.__qualname__}",
+        'table': sqlalchemy_model.__table__.name,
+        'columns': columns,
+        'relationships': relationships,
+        'dependencies': [[name, _package_version(name)] for name in dependencies],
+    }
+    return hashlib.sha256(json.dumps(definition, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def load_schema_spec(kind: str, sqlalchemy_model: type, dependencies: tuple = ()) -> Optional[dict]:
+    if _schema_cache_dir is None:
+        return None
+
+    cache_path = _cache_path(kind, sqlalchemy_model)
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as cache_file:
+            cached = json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+
+    if cached.get('hash') != model_definition_hash(sqlalchemy_model, dependencies):
+        logging.debug(f"Schema cache for {sqlalchemy_model.__name__} is stale: {cache_path}")
+        return None
+    logging.debug(f"Loaded {kind} schema spec for {sqlalchemy_model.__name__} from: {cache_path}")
+    return cached['spec']
+
+
+def save_schema_spec(kind: str, sqlalchemy_model: type, spec: dict, dependencies: tuple = ()):
+    if _schema_cache_dir is None:
+        return
+
+    cache_path = _cache_path(kind, sqlalchemy_model)
+    try:
+        os.makedirs(_schema_cache_dir, exist_ok=True)
+        content = json.dumps({'hash': model_definition_hash(sqlalchemy_model, dependencies), 'spec': spec})
+        # write to a temporary file first so concurrent workers never read a partial file
+        file_descriptor, temp_path = tempfile.mkstemp(dir=_schema_cache_dir, suffix='.tmp')
+        with os.fdopen(file_descriptor, 'w', encoding='utf-8') as temp_file:
+            temp_file.write(content)
+        os.replace(temp_path, cache_path)
+        logging.debug(f"Saved {kind} schema spec for {sqlalchemy_model.__name__} to: {cache_path}")
+    except (OSError, TypeError, ValueError) as e:
+        logging.warning(f"Failed to save {kind} schema spec for {sqlalchemy_model.__name__}: {e}")
+
+
+def _cache_path(kind: str, sqlalchemy_model: type) -> str:
+    model_name = f"{sqlalchemy_model.__module__}.{sqlalchemy_model.__qualname__}".replace('<locals>', 'locals')
+    return os.path.join(_schema_cache_dir, f"{kind}-{model_name}.json")
+
+
+def _type_repr(column_type) -> list:
+    # cheaper than repr(), which inspects the type constructor on every call
+    type_class = type(column_type)
+    return [f"{type_class.__module__}.{type_class.__qualname__}",
+            sorted([name, value] for name, value in vars(column_type).items()
+                   if value is None or isinstance(value, (int, float, str, bool)))]
+
+
+def _default_repr(default) -> Optional[str]:
+    if default is None:
+        return None
+    if getattr(default, 'is_callable', False):
+        callable_arg = getattr(default.arg, '__wrapped__', default.arg)
+        return f"callable:{getattr(callable_arg, '__module__', '')}.{getattr(callable_arg, '__qualname__', '')}"
+    return repr(default.arg)
+
+
+@functools.lru_cache(maxsize=None)
+def _package_version(name: str) -> Optional[str]:
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
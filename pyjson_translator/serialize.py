@@ -1,11 +1,16 @@
 import base64
 import importlib
 from collections.abc import Sequence, Set, Mapping
-from typing import Optional, get_origin, get_args, Union
+from typing import Optional, get_origin, get_args
 
 from flask_sqlalchemy import SQLAlchemy
 from pydantic import BaseModel
 
+from .columnar_util import (
+    encode_columnar,
+    is_columnar,
+    decode_columnar
+)
 from .db_sqlalchemy_instance import default_sqlalchemy_instance as db
 from .error_handle import fail_to_translator
 from .logger_setting import pyjson_translator_logging as logging
@@ -13,11 +18,59 @@ from .marshmallow_db_util import (
     orm_class_to_dict,
     orm_class_from_dict
 )
+from .projection_util import (
+    Projection,
+    normalize_projection,
+    is_field_included,
+    sub_projection
+)
+from .record_class_util import (
+    generate_record_encoder,
+    generate_record_decoder,
+    get_constructor_params,
+    get_record_field_names
+)
+from .stats_util import (
+    add_stats_listener,
+    call_with_exclusive_stats,
+    type_name
+)
+from .union_util import (
+    UNION_TYPES,
+    deserialize_union
+)
 
 
 def serialize_value(value: any,
                     db_sqlalchemy_instance: SQLAlchemy = db,
-                    db_sqlalchemy_merge: bool = False):
+                    db_sqlalchemy_merge: bool = False,
+                    include: Projection = None,
+                    exclude: Projection = None,
+                    columnar: bool = False):
+    """
+    Serialize ``value`` into JSON compatible data.
+
+    ``include`` and ``exclude`` take a set of field names or a nested dict of
+    field names, as pydantic ``model_dump`` does. They prune the fields of
+    models, record classes and plain objects; sequences, sets and mappings
+    apply them to every element.
+
+    ``columnar`` encodes every list of same-shaped records as field names and
+    per-field value arrays, see ``columnar_util.encode_columnar``. Nested lists
+    in containers, record classes and plain objects are encoded too; the fields
+    of pydantic and ORM models are dumped by their own serializers as usual.
+    """
+    # normalized once here, the recursion only passes normalized projections or None down
+    return _serialize_nested(value, db_sqlalchemy_instance, db_sqlalchemy_merge,
+                             normalize_projection(include), normalize_projection(exclude), columnar)
+
+
+def _serialize_value(value: any,
+                     db_sqlalchemy_instance: SQLAlchemy = db,
+                     db_sqlalchemy_merge: bool = False,
+                     include: Projection = None,
+                     exclude: Projection = None,
+                     columnar: bool = False):
     if value is None:
         logging.debug("Serializing None value.")
         return value
@@ -32,28 +85,49 @@ def serialize_value(value: any,
         complex_dict = {"real": value.real, "imaginary": value.imag}
         logging.debug(f"Serializing complex number to dict: {complex_dict}")
         return complex_dict
+    record_encoder = generate_record_encoder(type(value))
+    if record_encoder:
+        logging.debug(f"Serializing record class: {type(value).__name__}")
+        if (include is not None or exclude is not None) and not isinstance(value, tuple):
+            return serialize_fields(value, get_record_field_names(type(value)),
+                                    db_sqlalchemy_instance, db_sqlalchemy_merge, include, exclude, columnar)
+        return record_encoder(value, _serialize_columnar if columnar else _serialize_nested,
+                              db_sqlalchemy_instance, db_sqlalchemy_merge)
+    if columnar and isinstance(value, list):
+        logging.debug(f"Serializing columnar list of {len(value)} items")
+        serialized_items = [_serialize_nested(item, db_sqlalchemy_instance, db_sqlalchemy_merge, include, exclude,
+                                              columnar)
+                            for item in value]
+        return encode_columnar(serialized_items) or serialized_items
     if isinstance(value, tuple):
         logging.debug(f"Serializing tuple: {value}")
-        return [serialize_value(item, db_sqlalchemy_instance, db_sqlalchemy_merge) for item in value]
+        return [_serialize_nested(item, db_sqlalchemy_instance, db_sqlalchemy_merge, include, exclude,
+                                  columnar)
+                for item in value]
     if isinstance(value, Sequence):
         logging.debug(f"Serializing Sequence: {value}")
-        return [serialize_value(item, db_sqlalchemy_instance, db_sqlalchemy_merge) for item in value]
+        return [_serialize_nested(item, db_sqlalchemy_instance, db_sqlalchemy_merge, include, exclude,
+                                  columnar)
+                for item in value]
     if isinstance(value, Set):
         logging.debug(f"Serializing Set: {value}")
-        return [serialize_value(item, db_sqlalchemy_instance, db_sqlalchemy_merge) for item in value]
+        return [_serialize_nested(item, db_sqlalchemy_instance, db_sqlalchemy_merge, include, exclude,
+                                  columnar)
+                for item in value]
     if isinstance(value, Mapping):
         logging.debug(f"Serializing Mapping. Keys: {value.keys()}")
-        return {serialize_value(k, db_sqlalchemy_instance, db_sqlalchemy_merge):
-                    serialize_value(v, db_sqlalchemy_instance, db_sqlalchemy_merge)
+        return {_serialize_nested(k, db_sqlalchemy_instance, db_sqlalchemy_merge):
+                    _serialize_nested(v, db_sqlalchemy_instance, db_sqlalchemy_merge, include, exclude,
+                                      columnar)
                 for k, v in value.items()}
     if isinstance(value, db_sqlalchemy_instance.Model):
         logging.debug(f"Serializing sqlalchemy db.Model: {type(value).__name__}")
-        serialized_model = orm_class_to_dict(value, db_sqlalchemy_instance, db_sqlalchemy_merge)
+        serialized_model = orm_class_to_dict(value, db_sqlalchemy_instance, db_sqlalchemy_merge, include, exclude)
         logging.debug(f"Serialized sqlalchemy db.Model to dict: {serialized_model}")
         return serialized_model
     if isinstance(value, BaseModel):
         logging.debug(f"Serializing pydantic BaseModel: {type(value).__name__}")
-        model_dict = value.model_dump()
+        model_dict = value.model_dump(include=include, exclude=exclude)
         logging.debug(f"Serialized BaseModel to dict: {model_dict}")
         model_dict['_class_data'] = {
             'module': value.__class__.__module__,
@@ -63,7 +137,11 @@ def serialize_value(value: any,
         return model_dict
     if hasattr(value, '__dict__'):
         logging.debug(f"Serializing using __dict__ for: {type(value).__name__}")
-        return {k: serialize_value(v, db_sqlalchemy_instance, db_sqlalchemy_merge) for k, v in value.__dict__.items()}
+        if include is not None or exclude is not None:
+            return serialize_fields(value, list(value.__dict__),
+                                    db_sqlalchemy_instance, db_sqlalchemy_merge, include, exclude, columnar)
+        return {k: _serialize_nested(v, db_sqlalchemy_instance, db_sqlalchemy_merge, None, None, columnar)
+                for k, v in value.__dict__.items()}
     if callable(getattr(value, 'to_dict', None)):
         logging.debug(f"Serializing using custom method to_dict for: {type(value).__name__}")
         return value.to_dict()
@@ -73,14 +151,48 @@ def serialize_value(value: any,
     if get_origin(value) is Optional:
         logging.debug(
             f"Encountered an Optional type, deeper serialization might be required for: {value}")
-        return serialize_value(value, db_sqlalchemy_instance, db_sqlalchemy_merge)
+        return _serialize_nested(value, db_sqlalchemy_instance, db_sqlalchemy_merge, include, exclude)
     fail_to_translator(f"Unhandled serialize type {type(value).__name__}")
 
 
+def _serialize_columnar(value: any,
+                        db_sqlalchemy_instance: SQLAlchemy = db,
+                        db_sqlalchemy_merge: bool = False):
+    # record encoders call serialize(value, db, merge), this keeps columnar on for their fields
+    return _serialize_nested(value, db_sqlalchemy_instance, db_sqlalchemy_merge, None, None, True)
+
+
+def resolve_base_model_class(expected_type: type, class_data: Optional[dict]):
+    # payloads built outside serialize_value, e.g. tagged Union arms, have no _class_data
+    if class_data is None or '<locals>' in class_data['qualname']:
+        return expected_type
+    return getattr(importlib.import_module(class_data['module']), class_data['name'])
+
+
+def serialize_fields(value: any,
+                     field_names: list,
+                     db_sqlalchemy_instance: SQLAlchemy = db,
+                     db_sqlalchemy_merge: bool = False,
+                     include: Projection = None,
+                     exclude: Projection = None,
+                     columnar: bool = False):
+    logging.debug(f"Serializing projected fields for: {type(value).__name__}")
+    return {name: _serialize_nested(getattr(value, name), db_sqlalchemy_instance, db_sqlalchemy_merge,
+                                  sub_projection(include, name), sub_projection(exclude, name), columnar)
+            for name in field_names if is_field_included(name, include, exclude)}
+
+
 def deserialize_value(value: any,
                       expected_type: type = None,
                       db_sqlalchemy_instance: SQLAlchemy = db,
                       db_sqlalchemy_merge: bool = False):
+    return _deserialize_nested(value, expected_type, db_sqlalchemy_instance, db_sqlalchemy_merge)
+
+
+def _deserialize_value(value: any,
+                       expected_type: type = None,
+                       db_sqlalchemy_instance: SQLAlchemy = db,
+                       db_sqlalchemy_merge: bool = False):
     if value is None:
         logging.debug("Deserializing None value.")
         return value
@@ -97,43 +209,52 @@ def deserialize_value(value: any,
         return complex_value
 
     origin_expected_type = get_origin(expected_type)
+    if origin_expected_type in UNION_TYPES:
+        logging.debug(f"Deserializing Union type: {expected_type}")
+        return deserialize_union(value, expected_type, _deserialize_nested, db_sqlalchemy_instance, db_sqlalchemy_merge)
     if origin_expected_type:
         item_type = get_args(expected_type)[0]
+        if is_columnar(value) and not issubclass(origin_expected_type, Mapping):
+            logging.debug(f"Decoding columnar value of {value['_columnar']['length']} items")
+            value = decode_columnar(value)
 
-        if origin_expected_type is Union:
-            logging.debug(f"Deserializing Union type: {item_type.__name__}")
-            return deserialize_value(value, item_type, db_sqlalchemy_instance, db_sqlalchemy_merge)
         if issubclass(origin_expected_type, tuple):
             logging.debug(f"Deserializing tuple: {value}")
-            return tuple([deserialize_value(item, item_type, db_sqlalchemy_instance, db_sqlalchemy_merge) for item in value])
+            return tuple([_deserialize_nested(item, item_type, db_sqlalchemy_instance, db_sqlalchemy_merge) for item in value])
         if issubclass(origin_expected_type, Sequence):
             logging.debug(f"Deserializing Sequence: {value}")
-            return [deserialize_value(item, item_type, db_sqlalchemy_instance, db_sqlalchemy_merge) for item in value]
+            return [_deserialize_nested(item, item_type, db_sqlalchemy_instance, db_sqlalchemy_merge) for item in value]
         if issubclass(origin_expected_type, Set):
             logging.debug(f"Deserializing set: {value}")
             return set(
-                deserialize_value(item, item_type, db_sqlalchemy_instance, db_sqlalchemy_merge) for item in value)
+                _deserialize_nested(item, item_type, db_sqlalchemy_instance, db_sqlalchemy_merge) for item in value)
         if issubclass(origin_expected_type, Mapping):
             logging.debug(f"Deserializing dictionary. Keys: {value.keys()}")
             key_type, val_type = get_args(expected_type)
-            return {deserialize_value(k, key_type, db_sqlalchemy_instance, db_sqlalchemy_merge):
-                        deserialize_value(v, val_type, db_sqlalchemy_instance, db_sqlalchemy_merge)
+            return {_deserialize_nested(k, key_type, db_sqlalchemy_instance, db_sqlalchemy_merge):
+                        _deserialize_nested(v, val_type, db_sqlalchemy_instance, db_sqlalchemy_merge)
                     for k, v in value.items()}
 
+    record_decoder = generate_record_decoder(expected_type)
+    if record_decoder:
+        logging.debug(f"Deserializing record class: {expected_type.__name__}")
+        return record_decoder(value, _deserialize_nested, db_sqlalchemy_instance, db_sqlalchemy_merge)
+    if is_columnar(value) and issubclass(expected_type, (Sequence, Set)):
+        value = decode_columnar(value)
     if issubclass(expected_type, tuple):
         logging.debug(f"Deserializing tuple: {value}")
-        return tuple([deserialize_value(item, type(item), db_sqlalchemy_instance, db_sqlalchemy_merge) for item in value])
+        return tuple([_deserialize_nested(item, type(item), db_sqlalchemy_instance, db_sqlalchemy_merge) for item in value])
     if issubclass(expected_type, Sequence):
         logging.debug(f"Deserializing Sequence: {value}")
-        return [deserialize_value(item, type(item), db_sqlalchemy_instance, db_sqlalchemy_merge) for item in value]
+        return [_deserialize_nested(item, type(item), db_sqlalchemy_instance, db_sqlalchemy_merge) for item in value]
     if issubclass(expected_type, Set):
         logging.debug(f"Deserializing Set: {value}")
-        return set(deserialize_value(item, type(item), db_sqlalchemy_instance, db_sqlalchemy_merge) for item in value)
+        return set(_deserialize_nested(item, type(item), db_sqlalchemy_instance, db_sqlalchemy_merge) for item in value)
     if issubclass(expected_type, Mapping):
         logging.debug(f"Deserializing Mapping. Keys: {value.keys()}")
         return {
-            deserialize_value(k, type(k), db_sqlalchemy_instance, db_sqlalchemy_merge):
-                deserialize_value(v, type(v), db_sqlalchemy_instance, db_sqlalchemy_merge)
+            _deserialize_nested(k, type(k), db_sqlalchemy_instance, db_sqlalchemy_merge):
+                _deserialize_nested(v, type(v), db_sqlalchemy_instance, db_sqlalchemy_merge)
             for k, v in value.items()}
     if expected_type and issubclass(expected_type, db_sqlalchemy_instance.Model):
         logging.debug(f"Deserializing sqlalchemy db.Model: {expected_type.__name__}")
@@ -143,18 +264,14 @@ def deserialize_value(value: any,
     if expected_type and issubclass(expected_type, BaseModel):
         logging.debug(f"Deserializing pydantic BaseModel: {expected_type.__name__}")
 
-        real_base_model_class = expected_type
-        class_data = value.pop('_class_data')
-        if '<locals>' not in class_data['qualname']:
-            real_base_model_class = getattr(importlib.import_module(class_data['module']), class_data['name'])
-
+        value = dict(value)
+        real_base_model_class = resolve_base_model_class(expected_type, value.pop('_class_data', None))
         model_instance = real_base_model_class.model_validate(value)
         logging.debug(f"Deserialized BaseModel to instance: {model_instance}")
         return model_instance
     if expected_type and hasattr(expected_type, '__dict__'):
         logging.debug(f"Deserializing using __dict__ for: {expected_type.__name__}")
-        constructor_params = expected_type.__init__.__code__.co_varnames[
-                             1:expected_type.__init__.__code__.co_argcount]
+        constructor_params = get_constructor_params(expected_type)
         if all(param in value for param in constructor_params):
             return expected_type(**{param: value[param] for param in constructor_params})
         else:
@@ -168,3 +285,24 @@ def deserialize_value(value: any,
         logging.debug(f"Deserializing using custom method dict for: {expected_type.__name__}")
         return expected_type.dict(value)
     fail_to_translator(f"Unhandled deserialize type {expected_type.__name__ if expected_type else 'unknown'}")
+
+
+def _serialize_value_with_stats(value: any, *args):
+    return call_with_exclusive_stats('serialize', type_name(type(value)), value, _serialize_value, value, *args)
+
+
+def _deserialize_value_with_stats(value: any, expected_type: type = None, *args):
+    return call_with_exclusive_stats('deserialize', type_name(expected_type), value,
+                                     _deserialize_value, value, expected_type, *args)
+
+
+def _use_stats_handlers(enabled: bool):
+    # rebinding the recursion targets keeps disabled stats free of per-element checks
+    global _serialize_nested, _deserialize_nested
+    _serialize_nested = _serialize_value_with_stats if enabled else _serialize_value
+    _deserialize_nested = _deserialize_value_with_stats if enabled else _deserialize_value
+
+
+_serialize_nested = _serialize_value
+_deserialize_nested = _deserialize_value
+add_stats_listener(_use_stats_handlers)
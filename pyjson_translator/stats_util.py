@@ -0,0 +1,160 @@
+import bisect
+import functools
+import threading
+import time
+from collections.abc import Sized
+
+from .logger_setting import pyjson_translator_logging as logging
+
+STATS_ENABLED = False
+
+# upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0, float('inf'))
+LATENCY_BUCKET_LABELS = ('1us', '10us', '100us', '1ms', '10ms', '100ms', '1s', 'inf')
+
+_stats_lock = threading.Lock()
+_stats_data = {}
+_stats_exporter = None
+_stats_listeners = []
+_exclusive_state = threading.local()
+
+
+def set_stats_enabled(enabled: bool):
+    """
+    Enable or disable pyjson_translator performance statistics.
+
+    :param enabled: when False, instrumented calls only pay a flag check.
+    """
+    global STATS_ENABLED
+    STATS_ENABLED = enabled
+    for listener in _stats_listeners:
+        listener(enabled)
+
+
+def add_stats_listener(listener):
+    """
+    Call ``listener(enabled)`` now and whenever statistics are enabled or
+    disabled, so hot paths can swap instrumented functions in and out instead
+    of checking the flag on every call.
+    """
+    _stats_listeners.append(listener)
+    listener(STATS_ENABLED)
+
+
+def set_stats_exporter(exporter):
+    """
+    Set the exporter called with the stats snapshot by ``export_stats``.
+
+    :param exporter: a callable taking the ``stats()`` dict, or None.
+    """
+    global _stats_exporter
+    _stats_exporter = exporter
+
+
+def stats() -> dict:
+    """
+    Return a snapshot of the collected statistics, as
+    ``{operation: {handler: {'count', 'total_seconds', 'max_seconds', 'elements', 'bytes', 'histogram'}}}``.
+    """
+    with _stats_lock:
+        return {operation: {handler: {**handler_stats,
+                                      'histogram': dict(zip(LATENCY_BUCKET_LABELS, handler_stats['histogram']))}
+                            for handler, handler_stats in operation_stats.items()}
+                for operation, operation_stats in _stats_data.items()}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats_data.clear()
+
+
+def export_stats() -> dict:
+    snapshot = stats()
+    if _stats_exporter is not None:
+        _stats_exporter(snapshot)
+    return snapshot
+
+
+def record_call(operation: str, handler: str, elapsed: float, elements: int = 0, size: int = 0):
+    with _stats_lock:
+        operation_stats = _stats_data.setdefault(operation, {})
+        handler_stats = operation_stats.get(handler)
+        if handler_stats is None:
+            handler_stats = {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0,
+                             'elements': 0, 'bytes': 0, 'histogram': [0] * len(LATENCY_BUCKETS)}
+            operation_stats[handler] = handler_stats
+        handler_stats['count'] += 1
+        handler_stats['total_seconds'] += elapsed
+        handler_stats['max_seconds'] = max(handler_stats['max_seconds'], elapsed)
+        handler_stats['elements'] += elements
+        handler_stats['bytes'] += size
+        handler_stats['histogram'][bisect.bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+
+
+def type_name(value_type: any) -> str:
+    return getattr(value_type, '__name__', None) or str(value_type)
+
+
+def measure_payload(value: any) -> tuple:
+    """
+    Return the ``(elements, bytes)`` of a value, counting the length of
+    containers and of str/bytes payloads.
+    """
+    if isinstance(value, (str, bytes)):
+        return 0, len(value)
+    if isinstance(value, Sized):
+        return len(value), 0
+    return 0, 0
+
+
+def call_with_exclusive_stats(operation: str, handler: str, payload: any, func, *args):
+    """
+    Call ``func(*args)`` and record its exclusive time under ``operation``:
+    the time spent in nested calls recorded the same way is attributed to
+    their own handler only.
+    """
+    outer_nested_seconds = getattr(_exclusive_state, 'nested_seconds', 0.0)
+    _exclusive_state.nested_seconds = 0.0
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        elapsed = time.perf_counter() - start
+        exclusive_seconds = elapsed - _exclusive_state.nested_seconds
+        _exclusive_state.nested_seconds = outer_nested_seconds + elapsed
+        try:
+            elements, size = measure_payload(payload)
+            record_call(operation, handler, exclusive_seconds, elements, size)
+        except Exception as e:
+            logging.debug(f"Failed to record stats for {operation}: {e}")
+
+
+def with_stats(operation: str, handler_of, payload_of=None):
+    """
+    Record calls of the decorated function under ``operation``.
+
+    :param handler_of: called with the call arguments, returns the handler name.
+    :param payload_of: called with the call arguments, returns the payload
+                       measured with ``measure_payload``.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not STATS_ENABLED:
+                return func(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                try:
+                    elements, size = measure_payload(payload_of(*args, **kwargs)) if payload_of else (0, 0)
+                    record_call(operation, handler_of(*args, **kwargs), elapsed, elements, size)
+                except Exception as e:
+                    logging.debug(f"Failed to record stats for {operation}: {e}")
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,97 @@
+import io
+import itertools
+import json
+from typing import Iterator
+
+from flask_sqlalchemy import SQLAlchemy
+from marshmallow import fields
+from sqlalchemy.orm import Query
+
+from .db_sqlalchemy_instance import default_sqlalchemy_instance as db
+from .error_handle import fail_to_translator
+from .logger_setting import pyjson_translator_logging as logging
+from .marshmallow_db_util import generate_db_schema
+from .projection_util import Projection, normalize_projection, projection_to_marshmallow_options, \
+    apply_query_projection
+
+
+def stream_query(query: any,
+                 db_sqlalchemy_instance: SQLAlchemy = db,
+                 chunk_size: int = 1000,
+                 include: Projection = None,
+                 exclude: Projection = None,
+                 json_lines: bool = False) -> Iterator[str]:
+    """
+    Serialize the ORM rows of a ``Select`` or legacy ``Query`` chunk by chunk.
+
+    Rows are fetched ``chunk_size`` at a time with ``yield_per`` and dumped
+    through the cached marshmallow schema, so memory stays bounded by one
+    chunk whatever the size of the result. ``include`` and ``exclude`` are
+    also applied to the query, see ``apply_query_projection``, and the nested
+    relationships are loaded with ``selectinload`` once per chunk.
+
+    :return: an iterator of JSON text chunks which joined form one JSON
+             array, or one JSON document per line when ``json_lines`` is True.
+    """
+    if chunk_size < 1:
+        fail_to_translator(f"Stream chunk_size must be positive, got {chunk_size}")
+    include = normalize_projection(include)
+    exclude = normalize_projection(exclude)
+    sqlalchemy_model = query.column_descriptions[0]['entity']
+    # without include, the nested relationships of the schema are still loaded per chunk, not per row
+    query_include = include if include is not None else _schema_projection(
+        generate_db_schema(sqlalchemy_model(), db_sqlalchemy_instance))
+    query = apply_query_projection(query, sqlalchemy_model, query_include, exclude)
+    schemas = {}
+
+    def dump(instance):
+        instance_class = type(instance)
+        if instance_class not in schemas:
+            schema_class = generate_db_schema(instance, db_sqlalchemy_instance)
+            schemas[instance_class] = schema_class(**projection_to_marshmallow_options(include, exclude, schema_class))
+        return schemas[instance_class].dump(instance)
+
+    if not json_lines:
+        yield "["
+    separator = "\n" if json_lines else ","
+    row_count = 0
+    for chunk in _iter_partitions(query, db_sqlalchemy_instance, chunk_size):
+        encoded_rows = separator.join([json.dumps(dump(instance)) for instance in chunk])
+        if json_lines:
+            yield encoded_rows + "\n"
+        else:
+            yield encoded_rows if row_count == 0 else separator + encoded_rows
+        row_count += len(chunk)
+        logging.debug(f"Streamed {row_count} rows of {sqlalchemy_model.__name__}")
+    if not json_lines:
+        yield "]"
+
+
+def write_query(query: any,
+                stream: any,
+                db_sqlalchemy_instance: SQLAlchemy = db,
+                chunk_size: int = 1000,
+                include: Projection = None,
+                exclude: Projection = None,
+                json_lines: bool = False):
+    """
+    Write the chunks of ``stream_query`` to a text or binary ``stream``.
+    """
+    encode = not isinstance(stream, io.TextIOBase)
+    for encoded_chunk in stream_query(query, db_sqlalchemy_instance, chunk_size, include, exclude, json_lines):
+        stream.write(encoded_chunk.encode('utf-8') if encode else encoded_chunk)
+
+
+def _schema_projection(schema_class: type) -> dict:
+    return {field_name: _schema_projection(field.nested) if isinstance(field, fields.Nested) else True
+            for field_name, field in schema_class._declared_fields.items()}
+
+
+def _iter_partitions(query: any, db_sqlalchemy_instance: SQLAlchemy, chunk_size: int):
+    if isinstance(query, Query):
+        rows = iter(query.yield_per(chunk_size))
+        while chunk := list(itertools.islice(rows, chunk_size)):
+            yield chunk
+    else:
+        result = db_sqlalchemy_instance.session.execute(query, execution_options={'yield_per': chunk_size})
+        yield from result.scalars().partitions()
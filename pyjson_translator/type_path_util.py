@@ -0,0 +1,23 @@
+import functools
+import importlib
+
+
+def type_path(value_type: type) -> dict:
+    return {'module': value_type.__module__, 'qualname': value_type.__qualname__}
+
+
+def resolve_type_path(path: dict):
+    return _resolve_type(path['module'], path['qualname'])
+
+
+@functools.lru_cache(maxsize=1024)
+def _resolve_type(module_name: str, qualname: str):
+    if '<locals>' in qualname:
+        return None
+    try:
+        resolved = importlib.import_module(module_name)
+        for name in qualname.split('.'):
+            resolved = getattr(resolved, name)
+        return resolved
+    except (ImportError, AttributeError):
+        return None
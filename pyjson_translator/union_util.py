@@ -0,0 +1,169 @@
+import types
+from collections.abc import Sequence, Set, Mapping
+from typing import Literal, Union, get_origin, get_args, get_type_hints
+
+from pydantic import BaseModel
+
+from .error_handle import fail_to_translator
+from .logger_setting import pyjson_translator_logging as logging
+from .record_class_util import (
+    get_constructor_params,
+    get_record_field_names,
+    is_named_tuple_class,
+    is_record_class
+)
+
+GLOBAL_UNION_DISPATCH_CACHE = {}
+
+UNION_TYPES = (Union, types.UnionType)
+
+# the JSON value classes each primitive arm is serialized to
+_PRIMITIVE_JSON_CLASSES = {bool: (bool,), int: (int,), float: (float, int), str: (str,), bytes: (str,)}
+
+
+class UnionDispatch:
+    """
+    Precomputed arm selection for one ``Union`` type.
+    """
+
+    def __init__(self, union_type: any):
+        self.arm_types = [arm for arm in get_args(union_type) if arm is not type(None)]
+        self.primitive_arms = {}
+        self.class_data_arms = {}
+        self.tag_arms = {}
+        self.key_arms = {}
+        self.mapping_arms = []
+        self.sequence_arms = []
+
+        for arm in reversed(self.arm_types):
+            # reversed so the first declared arm wins shared JSON classes
+            for json_class in _PRIMITIVE_JSON_CLASSES.get(arm, ()):
+                self.primitive_arms[json_class] = arm
+
+        arm_keys = {}
+        arm_tags = {}
+        for arm in self.arm_types:
+            if isinstance(arm, type) and issubclass(arm, BaseModel):
+                self.class_data_arms[(arm.__module__, arm.__qualname__)] = arm
+            if _is_mapping_arm(arm):
+                self.mapping_arms.append(arm)
+                arm_keys[arm] = _arm_keys(arm)
+                arm_tags[arm] = _arm_tags(arm)
+            elif _is_sequence_arm(arm):
+                self.sequence_arms.append(arm)
+
+        self._index_tags(arm_tags)
+        for arm, keys in arm_keys.items():
+            other_keys = set().union(*[other for other_arm, other in arm_keys.items() if other_arm is not arm])
+            for key in keys - other_keys:
+                self.key_arms[key] = arm
+
+    def _index_tags(self, arm_tags: dict):
+        tag_owners = {}
+        for arm, tags in arm_tags.items():
+            for field_name, tag_values in tags.items():
+                for tag_value in tag_values:
+                    tag_owners.setdefault(field_name, {}).setdefault(tag_value, set()).add(arm)
+        for field_name, owners in tag_owners.items():
+            unique_tags = {tag_value: next(iter(arms)) for tag_value, arms in owners.items() if len(arms) == 1}
+            if unique_tags:
+                self.tag_arms[field_name] = unique_tags
+
+    def select_arm(self, value: any):
+        """
+        Return the arm ``value`` was serialized from, or None when only trying
+        each arm in order can tell.
+        """
+        primitive_arm = self.primitive_arms.get(value.__class__)
+        if primitive_arm is not None:
+            return primitive_arm
+        if isinstance(value, Mapping):
+            class_data = value.get('_class_data')
+            if isinstance(class_data, Mapping):
+                class_data_arm = self.class_data_arms.get((class_data.get('module'), class_data.get('qualname')))
+                if class_data_arm is not None:
+                    return class_data_arm
+            for field_name, tag_arms in self.tag_arms.items():
+                tag_value = value.get(field_name)
+                if tag_value in tag_arms:
+                    return tag_arms[tag_value]
+            for key in value:
+                if key in self.key_arms:
+                    return self.key_arms[key]
+            if len(self.mapping_arms) == 1:
+                return self.mapping_arms[0]
+        elif isinstance(value, list) and len(self.sequence_arms) == 1:
+            return self.sequence_arms[0]
+        return None
+
+
+def generate_union_dispatch(union_type: any) -> UnionDispatch:
+    if union_type not in GLOBAL_UNION_DISPATCH_CACHE:
+        GLOBAL_UNION_DISPATCH_CACHE[union_type] = UnionDispatch(union_type)
+    return GLOBAL_UNION_DISPATCH_CACHE[union_type]
+
+
+def deserialize_union(value: any, union_type: any, deserialize, db_sqlalchemy_instance, db_sqlalchemy_merge):
+    union_dispatch = generate_union_dispatch(union_type)
+    if len(union_dispatch.arm_types) == 1:
+        return deserialize(value, union_dispatch.arm_types[0], db_sqlalchemy_instance, db_sqlalchemy_merge)
+
+    union_arm = union_dispatch.select_arm(value)
+    if union_arm is not None:
+        logging.debug(f"Deserializing Union arm: {getattr(union_arm, '__name__', union_arm)}")
+        return deserialize(value, union_arm, db_sqlalchemy_instance, db_sqlalchemy_merge)
+
+    logging.debug(f"No discriminator for Union, trying each arm: {union_type}")
+    for arm in union_dispatch.arm_types:
+        try:
+            return deserialize(value, arm, db_sqlalchemy_instance, db_sqlalchemy_merge)
+        except Exception as e:
+            logging.debug(f"Union arm {getattr(arm, '__name__', arm)} does not match: {e}")
+    fail_to_translator(f"No Union arm of {union_type} matches value of type {type(value).__name__}")
+
+
+def _is_mapping_arm(arm: any) -> bool:
+    origin = get_origin(arm) or arm
+    if not isinstance(origin, type) or is_named_tuple_class(origin):
+        return False
+    if issubclass(origin, Mapping) or origin is complex:
+        return True
+    return not issubclass(origin, (Sequence, Set, bytes, int, float, str))
+
+
+def _is_sequence_arm(arm: any) -> bool:
+    origin = get_origin(arm) or arm
+    return isinstance(origin, type) and issubclass(origin, (Sequence, Set)) \
+        and not issubclass(origin, (str, bytes))
+
+
+def _arm_keys(arm: type) -> set:
+    if arm is complex:
+        return {'real', 'imaginary'}
+    if not isinstance(arm, type) or issubclass(arm, Mapping):
+        return set()
+    if issubclass(arm, BaseModel):
+        return {field.alias or name for name, field in arm.model_fields.items()}
+    if hasattr(arm, '__mapper__'):
+        return set(arm.__mapper__.column_attrs.keys()) | set(arm.__mapper__.relationships.keys())
+    if is_record_class(arm):
+        return set(get_record_field_names(arm))
+    try:
+        return set(get_constructor_params(arm))
+    except AttributeError:
+        return set()
+
+
+def _arm_tags(arm: type) -> dict:
+    if not isinstance(arm, type) or issubclass(arm, Mapping) or arm is complex:
+        return {}
+    if issubclass(arm, BaseModel):
+        annotations = {field.alias or name: field.annotation for name, field in arm.model_fields.items()}
+    else:
+        try:
+            # get_field_type_hints leaves out Literal hints, which record decoders pass through
+            annotations = get_type_hints(arm)
+        except Exception:
+            annotations = {}
+    return {name: set(get_args(annotation)) for name, annotation in annotations.items()
+            if get_origin(annotation) is Literal}
@@ -0,0 +1,61 @@
+import json
+from typing import List
+
+from pydantic import BaseModel
+
+from pyjson_translator.annotation import with_prepare_func_json_data, with_post_func_data
+from pyjson_translator.capture_util import set_capture_file, disable_capture, replay_capture
+
+
+class CaptureModel(BaseModel):
+    id: int
+    name: str
+
+
+@with_prepare_func_json_data
+@with_post_func_data
+def capture_echo(model: CaptureModel, repeat: int) -> List[CaptureModel]:
+    return [model] * repeat
+
+
+def test_capture_and_replay(tmp_path):
+    capture_path = str(tmp_path / "capture.jsonl")
+    set_capture_file(capture_path)
+    try:
+        capture_echo(CaptureModel(id=1, name="Example"), 2)
+        capture_echo(CaptureModel(id=2, name="Example"), 1)
+    finally:
+        disable_capture()
+    capture_echo(CaptureModel(id=3, name="Example"), 1)
+
+    with open(capture_path, encoding='utf-8') as capture_file:
+        records = [json.loads(line) for line in capture_file]
+    assert len(records) == 2
+    assert records[0]['arguments']['repeat'] == 2
+    assert records[0]['argument_types']['model']['qualname'] == "CaptureModel"
+    assert len(records[0]['result']) == 2
+
+    report = replay_capture(capture_path, iterations=2)
+    assert report['records'] == 2
+    assert report['operations'] == 12
+    assert report['skipped'] == 0
+    function_report = report['functions']['tests.test_capture.capture_echo']
+    assert function_report['count'] == 12
+    assert function_report['p50_seconds'] <= function_report['max_seconds']
+
+
+def test_capture_size_caps(tmp_path):
+    capture_path = str(tmp_path / "capture.jsonl")
+    set_capture_file(capture_path, max_payload_bytes=10)
+    try:
+        capture_echo(CaptureModel(id=1, name="Example"), 1)
+    finally:
+        disable_capture()
+    assert not (tmp_path / "capture.jsonl").exists()
+
+    set_capture_file(capture_path, sample_rate=0)
+    try:
+        capture_echo(CaptureModel(id=1, name="Example"), 1)
+    finally:
+        disable_capture()
+    assert not (tmp_path / "capture.jsonl").exists()
@@ -0,0 +1,98 @@
+import json
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+from pyjson_translator.db_sqlalchemy_instance import default_sqlalchemy_instance as db
+from pyjson_translator.lazy_util import deserialize_lazy, materialize
+from pyjson_translator.loads_util import loads_value
+from pyjson_translator.serialize import serialize_value, deserialize_value
+
+
+@dataclass
+class ColumnarRecord:
+    simple_id: int
+    name: str
+    score: Optional[float] = None
+
+
+class ColumnarModel(BaseModel):
+    id: int
+    name: str
+
+
+class ColumnarItem(db.Model):
+    __tablename__ = 'columnar_items'
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(50))
+
+
+def test_columnar_record_list():
+    record_list = [ColumnarRecord(simple_id=i, name=f"Example {i}", score=i / 2) for i in range(3)]
+    serialized = serialize_value(record_list, columnar=True)
+    assert serialized == {'_columnar': {'length': 3,
+                                        'fields': ['simple_id', 'name', 'score'],
+                                        'columns': [[0, 1, 2],
+                                                    ["Example 0", "Example 1", "Example 2"],
+                                                    [0.0, 0.5, 1.0]]}}
+    assert len(json.dumps(serialized)) < len(json.dumps(serialize_value(record_list)))
+    assert deserialize_value(serialized, List[ColumnarRecord]) == record_list
+
+
+def test_columnar_pydantic_list_stores_class_data_once():
+    model_list = [ColumnarModel(id=i, name=f"Example {i}") for i in range(3)]
+    serialized = serialize_value(model_list, columnar=True)
+    assert serialized['_columnar']['fields'] == ['id', 'name']
+    assert serialized['_columnar']['class_data']['name'] == 'ColumnarModel'
+    assert deserialize_value(serialized, List[ColumnarModel]) == model_list
+
+
+def test_columnar_orm_list():
+    item_list = [ColumnarItem(id=i, title=f"Item {i}") for i in range(3)]
+    serialized = serialize_value(item_list, columnar=True)
+    assert serialized['_columnar']['columns'][serialized['_columnar']['fields'].index('title')] == \
+           ["Item 0", "Item 1", "Item 2"]
+    assert deserialize_value(serialized, List[ColumnarItem]) == \
+           deserialize_value(serialize_value(item_list), List[ColumnarItem])
+
+
+def test_columnar_falls_back_to_list():
+    assert serialize_value([], columnar=True) == []
+    assert serialize_value([1, 2], columnar=True) == [1, 2]
+    mixed_list = [{'a': 1}, {'b': 2}]
+    assert serialize_value(mixed_list, columnar=True) == mixed_list
+
+
+def test_columnar_loads_and_lazy():
+    record_list = [ColumnarRecord(simple_id=i, name=f"Example {i}") for i in range(3)]
+    data = json.dumps(serialize_value(record_list, columnar=True))
+    assert loads_value(data, List[ColumnarRecord]) == record_list
+    assert loads_value(data.encode('utf-8'), List[ColumnarRecord]) == record_list
+    assert materialize(deserialize_lazy(json.loads(data), List[ColumnarRecord])) == record_list
+
+    model_list = [ColumnarModel(id=i, name=f"Example {i}") for i in range(3)]
+    data = json.dumps(serialize_value(model_list, columnar=True))
+    assert loads_value(data, List[ColumnarModel]) == model_list
+
+
+@dataclass
+class ColumnarGroup:
+    title: str
+    records: List[ColumnarRecord]
+
+
+def test_columnar_nested_lists():
+    record_list = [ColumnarRecord(simple_id=i, name=f"Example {i}") for i in range(3)]
+    serialized = serialize_value({'items': record_list}, columnar=True)
+    assert serialized['items']['_columnar']['fields'] == ['simple_id', 'name', 'score']
+    assert deserialize_value(serialized, Dict[str, List[ColumnarRecord]]) == {'items': record_list}
+
+    group = ColumnarGroup(title="Group", records=record_list)
+    for serialized in (serialize_value(group, columnar=True),
+                       serialize_value(group, include={'title', 'records'}, columnar=True)):
+        assert serialized['records']['_columnar']['length'] == 3
+        assert deserialize_value(serialized, ColumnarGroup) == group
+        assert loads_value(json.dumps(serialized), ColumnarGroup) == group
+        assert materialize(deserialize_lazy(serialized, ColumnarGroup)) == group
+    assert serialize_value([group], columnar=True)['_columnar']['columns'][1][0]['_columnar']['length'] == 3
@@ -0,0 +1,134 @@
+from dataclasses import dataclass, field
+from typing import List
+
+from pydantic import BaseModel
+
+from pyjson_translator import delta_util
+from pyjson_translator.db_sqlalchemy_instance import default_sqlalchemy_instance as db
+from pyjson_translator.delta_util import serialize_delta, apply_delta, patch_serialized
+from pyjson_translator.serialize import serialize_value
+
+
+class DeltaChildModel(BaseModel):
+    id: int
+    name: str
+
+
+class DeltaParentModel(BaseModel):
+    id: int
+    title: str
+    children: List[DeltaChildModel] = []
+
+
+@dataclass
+class DeltaDataclassModel:
+    simple_id: int
+    tags: List[str] = field(default_factory=list)
+
+
+class DeltaChildSubclassModel(DeltaChildModel):
+    rank: int = 0
+
+
+class DeltaAddress(db.Model):
+    __tablename__ = 'delta_addresses'
+    id = db.Column(db.Integer, primary_key=True)
+    city = db.Column(db.String(50))
+    user_id = db.Column(db.Integer, db.ForeignKey('delta_users.id'), nullable=False)
+
+
+class DeltaUser(db.Model):
+    __tablename__ = 'delta_users'
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(50), unique=True)
+    address = db.relationship("DeltaAddress", lazy='select')
+
+
+def test_unchanged_value_has_empty_delta():
+    parent_model = DeltaParentModel(id=1, title="Parent", children=[DeltaChildModel(id=1, name="Child")])
+    assert serialize_delta(parent_model, serialize_value(parent_model)) == []
+
+
+def test_pydantic_delta():
+    parent_model = DeltaParentModel(id=1, title="Parent", children=[DeltaChildModel(id=1, name="Child")])
+    previous_serialized = serialize_value(parent_model)
+
+    parent_model.children[0].name = "Renamed"
+    parent_model.children.append(DeltaChildModel(id=2, name="Second"))
+    delta = serialize_delta(parent_model, previous_serialized)
+    assert delta == [
+        {'op': 'replace', 'path': ['children', 0, 'name'], 'value': "Renamed"},
+        {'op': 'add', 'path': ['children', 1], 'value': {'id': 2, 'name': "Second"}},
+    ]
+
+    deserialized_model = apply_delta(previous_serialized, delta, DeltaParentModel)
+    assert deserialized_model == parent_model
+    assert previous_serialized['children'][0]['name'] == "Child"
+
+
+def test_dataclass_delta():
+    example_model = DeltaDataclassModel(simple_id=1, tags=["a", "b", "c"])
+    previous_serialized = serialize_value(example_model)
+
+    example_model.tags = ["a"]
+    delta = serialize_delta(example_model, previous_serialized)
+    assert delta == [{'op': 'remove', 'path': ['tags', 2]}, {'op': 'remove', 'path': ['tags', 1]}]
+    assert patch_serialized(previous_serialized, delta) == serialize_value(example_model)
+
+
+def test_sqlalchemy_delta():
+    user_instance = DeltaUser(id=1, username="john_doe", address=[DeltaAddress(id=1, city="New York", user_id=1)])
+    previous_serialized = serialize_value(user_instance)
+
+    user_instance.address[0].city = "Boston"
+    delta = serialize_delta(user_instance, previous_serialized)
+    assert delta == [{'op': 'replace', 'path': ['address', 0, 'city'], 'value': "Boston"}]
+    assert patch_serialized(previous_serialized, delta) == serialize_value(user_instance)
+
+
+def test_pydantic_delta_falls_back_to_model_dump():
+    parent_model = DeltaParentModel(id=1, title="Parent",
+                                    children=[DeltaChildModel(id=i, name="Child") for i in range(3)])
+    previous_serialized = serialize_value(parent_model)
+
+    parent_model.children[1] = DeltaChildSubclassModel(id=1, name="Child", rank=2)
+    delta = serialize_delta(parent_model, previous_serialized)
+    assert patch_serialized(previous_serialized, delta) == serialize_value(parent_model)
+
+
+def test_delta_keeps_primitive_classes():
+    example_list = [DeltaDataclassModel(simple_id=1), DeltaDataclassModel(simple_id=2)]
+    previous_serialized = serialize_value(example_list)
+
+    example_list[0].simple_id = True
+    example_list[1].simple_id = 2.0
+    delta = serialize_delta(example_list, previous_serialized)
+    assert delta == [{'op': 'replace', 'path': [0, 'simple_id'], 'value': True},
+                     {'op': 'replace', 'path': [1, 'simple_id'], 'value': 2.0}]
+
+
+def test_delta_walks_only_changed_items(monkeypatch):
+    walked_values = []
+    for walker_name in ('_diff_value', '_diff_pydantic_value'):
+        walker = getattr(delta_util, walker_name)
+        monkeypatch.setattr(delta_util, walker_name,
+                            lambda value, *args, walker=walker: walked_values.append(value) or walker(value, *args))
+
+    parent_model = DeltaParentModel(id=1, title="Parent",
+                                    children=[DeltaChildModel(id=i, name=f"Child {i}") for i in range(1000)])
+    example_model = DeltaDataclassModel(simple_id=1, tags=[DeltaDataclassModel(simple_id=i) for i in range(1000)])
+    user_instance = DeltaUser(id=1, username="john_doe",
+                              address=[DeltaAddress(id=i, city=f"City {i}", user_id=1) for i in range(1000)])
+    for value, changed_item, field_name, field_value in (
+            (parent_model, parent_model.children[500], 'name', "Renamed"),
+            (example_model, example_model.tags[500], 'simple_id', -1),
+            (user_instance, user_instance.address[500], 'city', "Boston")):
+        previous_serialized = serialize_value(value)
+        setattr(changed_item, field_name, field_value)
+
+        walked_values.clear()
+        delta = serialize_delta(value, previous_serialized)
+        assert len(delta) == 1
+        assert patch_serialized(previous_serialized, delta) == serialize_value(value)
+        assert [walked for walked in walked_values
+                if walked is not value and walked.__class__ is changed_item.__class__] == [changed_item]
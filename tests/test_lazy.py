@@ -0,0 +1,95 @@
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Union
+
+import pytest
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
+
+from pyjson_translator.lazy_util import deserialize_lazy, materialize, LazyList, LazyObjectProxy
+from pyjson_translator.serialize import serialize_value
+
+
+class LazyChildModel(BaseModel):
+    id: int
+    name: str
+
+
+class LazyParentModel(BaseModel):
+    id: int
+    children: List[LazyChildModel]
+    lookup: Dict[str, LazyChildModel] = {}
+    parent: Optional[LazyChildModel] = None
+
+    def child_names(self):
+        return [child.name for child in self.children]
+
+
+class LazyValidatedModel(BaseModel):
+    name: str
+    count: int = Field(ge=0)
+
+    @field_validator('name')
+    @classmethod
+    def upper_name(cls, name):
+        return name.upper()
+
+
+class LazyModelValidatedModel(BaseModel):
+    low: int
+    high: int
+
+    @model_validator(mode='after')
+    def check_order(self):
+        if self.low > self.high:
+            raise ValueError("low is above high")
+        return self
+
+
+@dataclass
+class LazyDataclassModel:
+    simple_id: int
+    models: List[LazyChildModel]
+
+
+def test_lazy_pydantic_model():
+    parent_model = LazyParentModel(id=1,
+                                   children=[LazyChildModel(id=1, name="First"), LazyChildModel(id=2, name="Second")],
+                                   lookup={"first": LazyChildModel(id=1, name="First")})
+    lazy_model = deserialize_lazy(serialize_value(parent_model), LazyParentModel)
+    assert isinstance(lazy_model, LazyObjectProxy)
+    assert isinstance(lazy_model.children, LazyList)
+    assert lazy_model.children[1].name == "Second"
+    assert lazy_model.children[1] is lazy_model.children[1]
+    assert lazy_model.lookup["first"].id == 1
+    assert lazy_model.parent is None
+    assert lazy_model.child_names() == ["First", "Second"]
+    assert materialize(lazy_model) == parent_model
+
+
+def test_lazy_list_of_dataclass():
+    model_list = [LazyDataclassModel(simple_id=i, models=[LazyChildModel(id=i, name="Child")]) for i in range(3)]
+    lazy_list = deserialize_lazy(serialize_value(model_list), List[LazyDataclassModel])
+    assert len(lazy_list) == 3
+    assert lazy_list[2].models[0].id == 2
+
+    materialized_list = materialize(lazy_list)
+    assert materialized_list == model_list
+    assert isinstance(materialized_list[0], LazyDataclassModel)
+
+
+def test_lazy_pydantic_fields_are_validated_by_the_model():
+    lazy_model = deserialize_lazy({'name': "abc", 'count': 1}, LazyValidatedModel)
+    assert lazy_model.name == "ABC"
+    assert lazy_model.count == 1
+
+    invalid_model = deserialize_lazy({'name': "abc", 'count': -5}, LazyValidatedModel)
+    with pytest.raises(ValidationError):
+        invalid_model.count
+    with pytest.raises(ValidationError):
+        deserialize_lazy({'low': 2, 'high': 1}, LazyModelValidatedModel)
+
+
+def test_lazy_union_types():
+    serialized_child = serialize_value(LazyChildModel(id=1, name="First"))
+    assert isinstance(deserialize_lazy(serialized_child, LazyChildModel | None), LazyObjectProxy)
+    assert deserialize_lazy(serialized_child, Union[int, LazyChildModel]).name == "First"
+    assert deserialize_lazy(3, Union[int, LazyChildModel]) == 3
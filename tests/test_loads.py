@@ -0,0 +1,68 @@
+import json
+from dataclasses import dataclass
+from typing import List, Dict, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+from pyjson_translator.loads_util import loads_value
+from pyjson_translator.serialize import serialize_value, deserialize_value
+
+
+@dataclass
+class LoadsRecord:
+    simple_id: int
+    name: str
+    score: Optional[float] = None
+
+
+@dataclass
+class LoadsNestedRecord:
+    record: LoadsRecord
+    tags: List[str]
+
+
+class LoadsModel(BaseModel):
+    id: int
+    name: str
+
+
+class LoadsExtraModel(BaseModel):
+    model_config = ConfigDict(extra='allow')
+
+    id: int
+
+
+def test_loads_flat_record_list():
+    record_list = [LoadsRecord(simple_id=i, name=f"Example {i}", score=i / 2) for i in range(5)]
+    data = json.dumps(serialize_value(record_list))
+    assert loads_value(data, List[LoadsRecord]) == record_list
+    assert loads_value(data.encode('utf-8'), List[LoadsRecord]) == record_list
+
+    # keys in another order, missing defaults and convertible values fall back to the record decoder
+    data = '[{"name": "Example", "simple_id": 1}, {"simple_id": "2", "name": "Example", "score": 1}]'
+    assert loads_value(data, List[LoadsRecord]) == [LoadsRecord(simple_id=1, name="Example"),
+                                                    LoadsRecord(simple_id=2, name="Example", score=1.0)]
+
+    # objects nested in unknown keys are not records
+    data = '[{"simple_id": 1, "name": "Example", "meta": {"a": 1}}, {"simple_id": 2, "name": "Example"}]'
+    assert loads_value(data, List[LoadsRecord]) == deserialize_value(json.loads(data), List[LoadsRecord])
+    data = '{"simple_id": 1, "name": "Example", "meta": {"simple_id": 2, "name": "Example"}}'
+    assert loads_value(data, LoadsRecord) == deserialize_value(json.loads(data), LoadsRecord)
+
+
+def test_loads_pydantic_models():
+    model_dict = {"a": [LoadsModel(id=1, name="Example")], "b": []}
+    data = json.dumps(serialize_value(model_dict))
+    assert loads_value(data, Dict[str, List[LoadsModel]]) == model_dict
+
+
+def test_loads_matches_deserialize_value():
+    nested_record = LoadsNestedRecord(record=LoadsRecord(simple_id=1, name="Example"), tags=["a", "b"])
+    for value, expected_type in [(nested_record, LoadsNestedRecord),
+                                 ({1: [1, 2], 2: []}, Dict[int, List[int]]),
+                                 (None, Optional[LoadsNestedRecord]),
+                                 (b"hello", bytes),
+                                 (3 + 4j, complex),
+                                 ([LoadsExtraModel(id=1)], List[LoadsExtraModel])]:
+        data = json.dumps(serialize_value(value))
+        assert loads_value(data, expected_type) == deserialize_value(json.loads(data), expected_type) == value
@@ -0,0 +1,111 @@
+import pytest
+from flask import Flask
+from pydantic import BaseModel
+from sqlalchemy import inspect, select
+
+from pyjson_translator.db_sqlalchemy_instance import default_sqlalchemy_instance as db
+from pyjson_translator.projection_util import apply_query_projection
+from pyjson_translator.pydantic_db_util import orm_class_to_dict
+from pyjson_translator.serialize import serialize_value
+
+
+class ProjectionAddress(db.Model):
+    __tablename__ = 'projection_addresses'
+    id = db.Column(db.Integer, primary_key=True)
+    street = db.Column(db.String(100))
+    city = db.Column(db.String(50))
+    user_id = db.Column(db.Integer, db.ForeignKey('projection_users.id'), nullable=False)
+
+
+class ProjectionUser(db.Model):
+    __tablename__ = 'projection_users'
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(50), unique=True)
+    email = db.Column(db.String(120), unique=True)
+    address = db.relationship("ProjectionAddress", lazy='select')
+
+
+class ProjectionModel(BaseModel):
+    id: int
+    name: str
+    active: bool = True
+
+
+class ProjectionSimpleModel:
+    def __init__(self, simple_id, name, model):
+        self.simple_id = simple_id
+        self.name = name
+        self.model = model
+
+
+@pytest.fixture
+def app_context():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        user_instance = ProjectionUser(id=1, username="john_doe", email="john@example.com")
+        user_instance.address = [ProjectionAddress(id=1, street="123 Main St", city="New York")]
+        db.session.add(user_instance)
+        db.session.commit()
+        db.session.expunge_all()
+        yield
+        db.session.remove()
+        db.drop_all()
+
+
+def test_pydantic_projection():
+    model_list = [ProjectionModel(id=1, name="Example"), ProjectionModel(id=2, name="Example")]
+    serialized_list = serialize_value(model_list, include={'id'})
+    assert [{k: v for k, v in item.items() if k != '_class_data'} for item in serialized_list] == [{'id': 1},
+                                                                                                    {'id': 2}]
+
+
+def test_simple_class_projection():
+    simple_model = ProjectionSimpleModel(simple_id=1, name="Example", model=ProjectionModel(id=1, name="Example"))
+    serialized_model = serialize_value(simple_model, exclude={'name': True, 'model': {'active'}})
+    assert serialized_model['simple_id'] == 1
+    assert 'name' not in serialized_model
+    assert 'active' not in serialized_model['model']
+
+
+def test_sqlalchemy_projection(app_context):
+    query = apply_query_projection(select(ProjectionUser), ProjectionUser,
+                                   include={'id': True, 'address': {'city'}})
+    user_instance = db.session.execute(query).scalars().one()
+    assert inspect(user_instance).unloaded >= {'username', 'email'}
+    assert inspect(user_instance.address[0]).unloaded >= {'street'}
+
+    serialized_user = serialize_value(user_instance, include={'id': True, 'address': {'city'}})
+    assert serialized_user == {'id': 1, 'address': [{'city': "New York"}]}
+
+
+def test_sqlalchemy_projection_noload(app_context):
+    query = apply_query_projection(select(ProjectionUser), ProjectionUser, exclude={'address'})
+    user_instance = db.session.execute(query).scalars().one()
+    assert user_instance.address == []
+    assert orm_class_to_dict(user_instance, exclude={'address'}) == {
+        'id': 1, 'username': "john_doe", 'email': "john@example.com"}
+
+
+def test_pydantic_orm_nested_projection(app_context):
+    user_instance = db.session.get(ProjectionUser, 1)
+    assert orm_class_to_dict(user_instance, include={'id': True, 'address': {'city'}}) == {
+        'id': 1, 'address': [{'city': "New York"}]}
+    assert orm_class_to_dict(user_instance, exclude={'email': True, 'address': {'street', 'user_id'}}) == {
+        'id': 1, 'username': "john_doe", 'address': [{'id': 1, 'city': "New York"}]}
+    assert orm_class_to_dict(user_instance, include={'id': True, 'address': {'city'}}) == \
+           serialize_value(user_instance, include={'id': True, 'address': {'city'}})
+
+
+def test_unknown_projection_fields_are_ignored(app_context):
+    user_instance = db.session.get(ProjectionUser, 1)
+    projection = {'id': True, 'unknown': True, 'address': {'city', 'unknown'}}
+    assert serialize_value(user_instance, include=projection) == {'id': 1, 'address': [{'city': "New York"}]}
+    assert serialize_value(user_instance, include=projection) == orm_class_to_dict(user_instance, include=projection)
+    assert serialize_value(user_instance, exclude={'unknown', 'email', 'address'}) == {
+        'id': 1, 'username': "john_doe"}
+
+    simple_model = ProjectionSimpleModel(simple_id=1, name="Example", model=ProjectionModel(id=1, name="Example"))
+    assert serialize_value(simple_model, include={'simple_id', 'unknown'}) == {'simple_id': 1}
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
+
+from pyjson_translator import marshmallow_db_util
+from pyjson_translator.db_sqlalchemy_instance import default_sqlalchemy_instance as db
+from pyjson_translator.schema_cache_util import set_schema_cache_dir
+
+
+class CacheAddress(db.Model):
+    __tablename__ = 'cache_addresses'
+    id = db.Column(db.Integer, primary_key=True)
+    city = db.Column(db.String(50), default="New York")
+    user_id = db.Column(db.Integer, db.ForeignKey('cache_users.id'), nullable=False)
+
+
+class CacheUser(db.Model):
+    __tablename__ = 'cache_users'
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(50), unique=True)
+    score = db.Column(db.Numeric(10, 2))
+    address = db.relationship("CacheAddress", lazy='select')
+
+
+@pytest.fixture
+def schema_cache_dir(tmp_path):
+    set_schema_cache_dir(str(tmp_path))
+    yield tmp_path
+    set_schema_cache_dir(None)
+    _clear_schema_cache()
+
+
+def _clear_schema_cache():
+    for model in (CacheUser, CacheAddress):
+        marshmallow_db_util.GLOBAL_DB_SCHEMA_CACHE.pop(model, None)
+
+
+def test_marshmallow_schema_cache(schema_cache_dir):
+    _clear_schema_cache()
+    user_instance = CacheUser(id=1, username="john_doe", address=[CacheAddress(id=1, city="Boston", user_id=1)])
+    introspected_schema = marshmallow_db_util.generate_db_schema(user_instance)
+    assert issubclass(introspected_schema, SQLAlchemyAutoSchema)
+    assert (schema_cache_dir / "marshmallow-tests.test_schema_cache.CacheUser.json").exists()
+    expected_dump = introspected_schema().dump(user_instance)
+
+    _clear_schema_cache()
+    cached_schema = marshmallow_db_util.generate_db_schema(user_instance)
+    assert not issubclass(cached_schema, SQLAlchemyAutoSchema)
+    assert cached_schema().dump(user_instance) == expected_dump
+    assert cached_schema().validate({'username': "x" * 51})
+
+
+def test_stale_schema_cache_is_ignored(schema_cache_dir):
+    _clear_schema_cache()
+    marshmallow_db_util.generate_db_schema(CacheAddress())
+    cache_path = schema_cache_dir / "marshmallow-tests.test_schema_cache.CacheAddress.json"
+    cached = json.loads(cache_path.read_text())
+    cached['hash'] = "stale"
+    cache_path.write_text(json.dumps(cached))
+
+    _clear_schema_cache()
+    assert issubclass(marshmallow_db_util.generate_db_schema(CacheAddress()), SQLAlchemyAutoSchema)
+    assert json.loads(cache_path.read_text())['hash'] != "stale"
@@ -1,6 +1,7 @@
 import importlib.util
+from dataclasses import dataclass, field
 from importlib.util import source_hash
-from typing import List
+from typing import List, Literal, NamedTuple
 
 import pytest
 from pydantic import BaseModel
@@ -8,6 +9,7 @@ from sqlalchemy import CHAR, TypeDecorator
 from sqlalchemy.dialects.postgresql import UUID
 
 from pyjson_translator.db_sqlalchemy_instance import default_sqlalchemy_instance as db
+from pyjson_translator.error_handle import PyjsonTranslatorException
 from pyjson_translator.serialize import serialize_value, deserialize_value
 
 # Check if marshmallow is installed
@@ -189,3 +191,105 @@ def test_tuple_types():
     serialized_source_tuple = serialize_value(source_tuple)
     target_tuple = deserialize_value(serialized_source_tuple, tuple)
     assert target_tuple == source_tuple
+
+
+@dataclass(slots=True)
+class SlottedDataclassModel:
+    simple_id: int
+    name: str
+    tags: List[str] = field(default_factory=list)
+
+
+class SlotsModel:
+    __slots__ = ('simple_id', 'name')
+
+    def __init__(self, simple_id, name):
+        self.simple_id = simple_id
+        self.name = name
+
+
+class PrivateSlotsModel:
+    __slots__ = ('__secret', 'name')
+    __secret: int
+
+    def __init__(self, secret, name):
+        self.__secret = secret
+        self.name = name
+
+
+class PointTuple(NamedTuple):
+    x: int
+    y: int
+    label: str = "origin"
+
+
+@dataclass
+class TaggedDataclassModel:
+    kind: Literal['tagged']
+    simple_id: int
+
+
+@dataclass
+class NestedDataclassModel:
+    point: PointTuple
+    models: List[SlottedDataclassModel]
+
+
+def test_slotted_dataclass_types():
+    example_model = SlottedDataclassModel(simple_id=1, name="Example", tags=["a", "b"])
+
+    serialized_model = serialize_value(example_model)
+    assert serialized_model == {'simple_id': 1, 'name': "Example", 'tags': ["a", "b"]}
+
+    deserialized_model = deserialize_value(serialized_model, SlottedDataclassModel)
+    assert deserialized_model == example_model
+
+
+def test_slots_class_types():
+    example_model = SlotsModel(simple_id=1, name="Example")
+
+    serialized_model = serialize_value(example_model)
+    assert serialized_model == {'simple_id': 1, 'name': "Example"}
+
+    deserialized_model = deserialize_value(serialized_model, SlotsModel)
+    assert isinstance(deserialized_model, SlotsModel)
+    assert deserialized_model.simple_id == example_model.simple_id
+
+
+def test_private_slots_class_types():
+    serialized_model = serialize_value(PrivateSlotsModel(1, "Example"))
+    assert serialized_model == {'_PrivateSlotsModel__secret': 1, 'name': "Example"}
+    deserialized_model = deserialize_value({**serialized_model, '_PrivateSlotsModel__secret': "2"}, PrivateSlotsModel)
+    assert deserialized_model._PrivateSlotsModel__secret == 2
+    assert deserialized_model.name == "Example"
+
+    unset_model = PrivateSlotsModel.__new__(PrivateSlotsModel)
+    unset_model.name = "Example"
+    with pytest.raises(PyjsonTranslatorException):
+        serialize_value(unset_model)
+
+
+def test_named_tuple_types():
+    serialized_point = serialize_value(PointTuple(1, 2))
+    assert serialized_point == [1, 2, "origin"]
+    assert deserialize_value(serialized_point, PointTuple) == PointTuple(1, 2)
+    assert deserialize_value([3, 4], PointTuple) == PointTuple(3, 4)
+
+
+def test_nested_dataclass_types():
+    nested_model = NestedDataclassModel(point=PointTuple(1, 2, "p"),
+                                        models=[SlottedDataclassModel(simple_id=1, name="Example")])
+
+    deserialized_model = deserialize_value(serialize_value(nested_model), NestedDataclassModel)
+    assert deserialized_model == nested_model
+    assert isinstance(deserialized_model.point, PointTuple)
+
+
+def test_dataclass_literal_types():
+    example_model = TaggedDataclassModel(kind='tagged', simple_id=1)
+    assert deserialize_value(serialize_value(example_model), TaggedDataclassModel) == example_model
+
+
+def test_dataclass_missing_parameters():
+    with pytest.raises(PyjsonTranslatorException):
+        deserialize_value({'name': "Example"}, SlottedDataclassModel)
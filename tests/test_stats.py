@@ -0,0 +1,94 @@
+import time
+
+import pytest
+from pydantic import BaseModel
+
+from pyjson_translator import serialize
+from pyjson_translator.annotation import with_prepare_func_json_data, with_post_func_data
+from pyjson_translator.serialize import serialize_value, deserialize_value
+from pyjson_translator.stats_util import (
+    set_stats_enabled,
+    set_stats_exporter,
+    stats,
+    reset_stats,
+    export_stats
+)
+
+
+class StatsModel(BaseModel):
+    id: int
+    name: str
+
+
+class SlowStatsValue:
+    @property
+    def __dict__(self):
+        time.sleep(0.01)
+        return {}
+
+
+@with_prepare_func_json_data
+@with_post_func_data
+def stats_echo(model: StatsModel) -> StatsModel:
+    return model
+
+
+@pytest.fixture
+def stats_enabled():
+    reset_stats()
+    set_stats_enabled(True)
+    yield
+    set_stats_enabled(False)
+    set_stats_exporter(None)
+    reset_stats()
+
+
+def test_stats_disabled_by_default():
+    reset_stats()
+    serialize_value([1, 2, 3])
+    assert stats() == {}
+
+
+def test_serialize_stats(stats_enabled):
+    serialized_list = serialize_value(["a", "bc"])
+    deserialize_value(serialized_list, list)
+
+    serialize_stats = stats()['serialize']
+    assert serialize_stats['list']['count'] == 1
+    assert serialize_stats['list']['elements'] == 2
+    assert serialize_stats['str']['count'] == 2
+    assert serialize_stats['str']['bytes'] == 3
+    assert sum(serialize_stats['str']['histogram'].values()) == 2
+    assert stats()['deserialize']['list']['count'] == 1
+
+
+def test_nested_stats_are_exclusive(stats_enabled):
+    serialize_value([SlowStatsValue()])
+
+    serialize_stats = stats()['serialize']
+    assert serialize_stats['SlowStatsValue']['total_seconds'] >= 0.02
+    assert serialize_stats['list']['total_seconds'] < 0.01
+
+
+def test_disabled_stats_use_plain_recursion():
+    set_stats_enabled(True)
+    assert serialize._serialize_nested is not serialize._serialize_value
+    set_stats_enabled(False)
+    assert serialize._serialize_nested is serialize._serialize_value
+    assert serialize._deserialize_nested is serialize._deserialize_value
+
+
+def test_decorator_stats_and_exporter(stats_enabled):
+    exported = []
+    set_stats_exporter(exported.append)
+
+    stats_echo(StatsModel(id=1, name="Example"))
+    snapshot = export_stats()
+
+    assert exported == [snapshot]
+    assert snapshot['prepare_func']['stats_echo']['count'] == 1
+    assert snapshot['post_func']['stats_echo']['count'] == 1
+    assert snapshot['serialize']['StatsModel']['count'] == 2
+
+    reset_stats()
+    assert stats() == {}
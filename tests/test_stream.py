@@ -0,0 +1,98 @@
+import io
+import json
+import tracemalloc
+
+import pytest
+from flask import Flask
+from sqlalchemy import event
+
+from pyjson_translator.db_sqlalchemy_instance import default_sqlalchemy_instance as db
+from pyjson_translator.serialize import serialize_value
+from pyjson_translator.stream_util import stream_query, write_query
+
+STREAM_ROW_COUNT = 5000
+
+
+class StreamTag(db.Model):
+    __tablename__ = 'stream_tags'
+    id = db.Column(db.Integer, primary_key=True)
+    label = db.Column(db.String(50))
+    row_id = db.Column(db.Integer, db.ForeignKey('stream_rows.id'), nullable=False)
+
+
+class StreamRow(db.Model):
+    __tablename__ = 'stream_rows'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50))
+    payload = db.Column(db.String(200))
+    tags = db.relationship("StreamTag", lazy='select')
+
+
+@pytest.fixture
+def app_context():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([StreamRow(id=i, name=f"Row {i}", payload="x" * 200) for i in range(STREAM_ROW_COUNT)])
+        db.session.add(StreamTag(id=1, label="first", row_id=0))
+        db.session.commit()
+        db.session.expunge_all()
+        yield
+        db.session.remove()
+        db.drop_all()
+
+
+def test_stream_select_matches_serialize_value(app_context):
+    statement = db.select(StreamRow).where(StreamRow.id < 250).order_by(StreamRow.id)
+    streamed_rows = json.loads("".join(stream_query(statement, chunk_size=100)))
+    assert len(streamed_rows) == 250
+    assert streamed_rows == serialize_value(db.session.scalars(statement).all())
+    assert streamed_rows[0]['tags'][0]['label'] == "first"
+
+
+def test_stream_loads_relationships_per_chunk(app_context):
+    statements = []
+
+    def count_statement(*args):
+        statements.append(args[2])
+
+    event.listen(db.engine, 'before_cursor_execute', count_statement)
+    statement = db.select(StreamRow).where(StreamRow.id < 300).order_by(StreamRow.id)
+    streamed_rows = json.loads("".join(stream_query(statement, chunk_size=100)))
+    event.remove(db.engine, 'before_cursor_execute', count_statement)
+    assert len(streamed_rows) == 300
+    assert streamed_rows[0]['tags'][0]['label'] == "first"
+    # one row query and one selectinload query per chunk instead of one query per row
+    assert len(statements) <= 6, statements
+
+
+def test_stream_legacy_query_json_lines_and_projection(app_context):
+    query = StreamRow.query.filter(StreamRow.id < 10).order_by(StreamRow.id)
+    stream = io.BytesIO()
+    write_query(query, stream, chunk_size=3, include={'id', 'name'}, json_lines=True)
+    lines = stream.getvalue().decode('utf-8').splitlines()
+    assert [json.loads(line) for line in lines] == [{'id': i, 'name': f"Row {i}"} for i in range(10)]
+
+    assert "".join(stream_query(StreamRow.query.filter(StreamRow.id < 0))) == "[]"
+
+
+def test_stream_memory_is_bounded(app_context):
+    statement = db.select(StreamRow).order_by(StreamRow.id)
+    row_fields = {'id', 'name', 'payload'}
+
+    tracemalloc.start()
+    streamed_rows = sum(encoded_chunk.count('"payload"')
+                        for encoded_chunk in stream_query(statement, chunk_size=100, include=row_fields))
+    _, stream_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.session.expunge_all()
+
+    tracemalloc.start()
+    json.dumps(serialize_value(db.session.scalars(statement).all(), include=row_fields))
+    _, materialized_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert streamed_rows == STREAM_ROW_COUNT
+    assert stream_peak * 4 < materialized_peak
@@ -0,0 +1,100 @@
+import json
+from dataclasses import dataclass
+from typing import List, Dict, Literal, Optional, Union
+
+import pytest
+from pydantic import BaseModel
+
+from pyjson_translator.error_handle import PyjsonTranslatorException
+from pyjson_translator.loads_util import loads_value
+from pyjson_translator.serialize import serialize_value, deserialize_value
+from pyjson_translator.union_util import generate_union_dispatch
+
+
+class UnionCat(BaseModel):
+    kind: Literal['cat']
+    name: str
+
+
+class UnionDog(BaseModel):
+    kind: Literal['dog']
+    name: str
+
+
+class UnionPoint(BaseModel):
+    x: int
+    y: int
+
+
+class UnionCircle(BaseModel):
+    x: int
+    y: int
+    radius: float
+
+
+@dataclass
+class UnionRecord:
+    simple_id: int
+    label: str
+
+
+def test_union_literal_discriminator():
+    pets = [UnionCat(kind='cat', name='Tom'), UnionDog(kind='dog', name='Rex')]
+    assert deserialize_value(serialize_value(pets), List[Union[UnionCat, UnionDog]]) == pets
+
+    # the tag alone is enough, without _class_data
+    assert deserialize_value({'kind': 'dog', 'name': 'Rex'}, Union[UnionCat, UnionDog]) == pets[1]
+
+
+@dataclass
+class UnionCatRecord:
+    kind: Literal['cat']
+    name: str
+
+
+@dataclass
+class UnionDogRecord:
+    kind: Literal['dog']
+    name: str
+
+
+def test_union_literal_discriminator_records():
+    pets = [UnionCatRecord(kind='cat', name='Tom'), UnionDogRecord(kind='dog', name='Rex')]
+    assert deserialize_value(serialize_value(pets), List[Union[UnionCatRecord, UnionDogRecord]]) == pets
+
+
+def test_union_class_data_and_distinguishing_keys():
+    shapes = [UnionPoint(x=1, y=2), UnionCircle(x=1, y=2, radius=3.0)]
+    assert deserialize_value(serialize_value(shapes), List[Union[UnionPoint, UnionCircle]]) == shapes
+
+    # without _class_data the radius key only belongs to UnionCircle
+    union_dispatch = generate_union_dispatch(Union[UnionPoint, UnionCircle, UnionRecord])
+    assert union_dispatch.select_arm({'x': 1, 'y': 2, 'radius': 3.0}) is UnionCircle
+    assert union_dispatch.select_arm({'simple_id': 1, 'label': 'a'}) is UnionRecord
+    assert union_dispatch.select_arm({'x': 1, 'y': 2}) is None
+
+
+def test_union_primitives_and_containers():
+    union_type = Union[int, str, bytes, UnionRecord, List[int], None]
+    for value in [1, "text", UnionRecord(simple_id=1, label="a"), [1, 2], None]:
+        assert deserialize_value(serialize_value(value), union_type) == value
+    assert deserialize_value(1, Union[float, str]) == 1.0
+    assert isinstance(deserialize_value(1, Union[int, float]), int)
+    assert deserialize_value({'a': 1}, Optional[Dict[str, int]]) == {'a': 1}
+    assert deserialize_value(serialize_value(UnionPoint(x=1, y=2)), UnionPoint | None) == UnionPoint(x=1, y=2)
+
+
+def test_union_ordered_fallback():
+    # no tag, _class_data or distinguishing key: the first arm able to decode the value wins
+    assert deserialize_value({'x': 1, 'y': 2}, Union[UnionCircle, UnionPoint]) == UnionPoint(x=1, y=2)
+    assert deserialize_value({'a': 1}, Union[Dict[str, int], Dict[str, str]]) == {'a': 1}
+    with pytest.raises(PyjsonTranslatorException):
+        deserialize_value({'x': 'a', 'y': 2}, Union[UnionCircle, UnionPoint])
+
+
+def test_loads_union():
+    pets = [UnionCat(kind='cat', name='Tom'), UnionDog(kind='dog', name='Rex'), None]
+    data = json.dumps(serialize_value(pets))
+    assert loads_value(data, List[Optional[Union[UnionCat, UnionDog]]]) == pets
+    assert loads_value('[1, "a", {"simple_id": 1, "label": "b"}]', List[Union[int, str, UnionRecord]]) == \
+           [1, "a", UnionRecord(simple_id=1, label="b")]